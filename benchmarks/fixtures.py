@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+# Fixture name -> (number of bars, bar frequency)
+FIXTURE_SIZES = {
+    "1mo_daily": (21, "B"),
+    "1y_daily": (252, "B"),
+    "5y_daily": (1260, "B"),
+    "20y_daily": (5040, "B"),
+    "2y_hourly": (2 * 252 * 7, "h"),
+    "3y_5min": (3 * 252 * 78, "5min"),
+}
+
+
+def make_ohlcv(bars: int, freq: str = "B", seed: int = 0) -> pd.DataFrame:
+    """
+    Generate a deterministic synthetic OHLCV frame shaped like yfinance output.
+
+    Prices follow a geometric random walk; each bar's high and low bracket
+    its open and close.
+
+    Args:
+        bars: Number of bars
+        freq: Pandas frequency of the bar timestamps
+        seed: Random seed
+
+    Returns:
+        DataFrame with Open, High, Low, Close and Volume columns
+    """
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, bars)))
+    open_ = np.concatenate([[close[0]], close[:-1]]) * (1 + rng.normal(0, 0.002, bars))
+    spread = np.abs(rng.normal(0, 0.005, bars)) * close
+    index = pd.date_range("2000-01-03", periods=bars, freq=freq, tz="America/New_York")
+    return pd.DataFrame({
+        "Open": open_,
+        "High": np.maximum(open_, close) + spread,
+        "Low": np.minimum(open_, close) - spread,
+        "Close": close,
+        "Volume": rng.integers(100_000, 10_000_000, bars),
+    }, index=index)
+
+
+def make_dividends(years: int = 20, seed: int = 0) -> pd.DataFrame:
+    """
+    Generate a quarterly dividend history like get_dividend_data returns.
+
+    Args:
+        years: Number of years of payments
+        seed: Random seed
+
+    Returns:
+        DataFrame with a Dividends column indexed by payment date
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2000-03-15", periods=years * 4, freq="QS-MAR", tz="America/New_York")
+    amounts = 0.2 * np.cumprod(1 + np.abs(rng.normal(0.01, 0.01, len(index))))
+    return pd.DataFrame({"Dividends": amounts}, index=index)
+
+
+def build_fixtures(names=None) -> dict:
+    """Build the named OHLCV fixtures, or all of them"""
+    names = names or list(FIXTURE_SIZES)
+    return {name: make_ohlcv(*FIXTURE_SIZES[name]) for name in names}
@@ -0,0 +1,170 @@
+"""
+Offline benchmarks for the indicator and chart-building hot paths.
+
+    python -m benchmarks.run                        # all fixtures
+    python -m benchmarks.run --fixtures 5y_daily    # a subset
+    python -m benchmarks.run --compare benchmarks/results/<earlier>.json
+
+Each benchmark reports best and median wall time over several repeats and
+the peak memory allocated during one extra traced run. Results are written
+as JSON so later runs can be compared against them.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+import plotly
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import FIXTURE_SIZES, build_fixtures, make_dividends
+from components.chart import calculate_technical_indicators, compute_indicators, create_stock_chart, create_dividend_chart
+from components.indicators import INDICATOR_GROUPS
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Slowdown against the baseline that is reported as a regression
+REGRESSION_THRESHOLD = 1.2
+
+ALL_INDICATORS = {name: True for name in ('sma', 'bollinger', 'rsi', 'macd')}
+
+
+def measure(func: Callable, repeat: int) -> Dict[str, float]:
+    """
+    Time a function and record its peak traced memory.
+
+    Args:
+        func: Zero-argument function to benchmark
+        repeat: Number of timed runs
+
+    Returns:
+        Dictionary with best_s, median_s and peak_mb
+    """
+    func()  # warm-up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "best_s": min(timings),
+        "median_s": statistics.median(timings),
+        "peak_mb": peak / 2 ** 20,
+    }
+
+
+def define_benchmarks(fixtures: Dict[str, pd.DataFrame]) -> Dict[str, Callable]:
+    """Return benchmark name -> zero-argument function for the given fixtures"""
+    benchmarks = {}
+    for fixture, data in fixtures.items():
+        benchmarks[f"calculate_technical_indicators/{fixture}"] = \
+            lambda data=data: calculate_technical_indicators(data)
+        for group in INDICATOR_GROUPS:
+            for backend in ("pandas", "numpy"):
+                benchmarks[f"indicator[{group},{backend}]/{fixture}"] = \
+                    lambda data=data, group=group, backend=backend: compute_indicators(data, [group], backend)
+        benchmarks[f"create_stock_chart[none]/{fixture}"] = \
+            lambda data=data: create_stock_chart(data, "Benchmark Corp", {})
+        benchmarks[f"create_stock_chart[all]/{fixture}"] = \
+            lambda data=data: create_stock_chart(data, "Benchmark Corp", ALL_INDICATORS)
+        benchmarks[f"create_stock_chart[all]+to_json/{fixture}"] = \
+            lambda data=data: create_stock_chart(data, "Benchmark Corp", ALL_INDICATORS).to_json()
+
+    dividends = make_dividends()
+    benchmarks["create_dividend_chart/20y_quarterly"] = \
+        lambda: create_dividend_chart(dividends, "Benchmark Corp")
+    return benchmarks
+
+
+def environment() -> Dict[str, str]:
+    """Describe the machine and library versions a run was made with"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, cwd=os.path.dirname(RESULTS_DIR)).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "plotly": plotly.__version__,
+    }
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict]) -> List[str]:
+    """
+    Print each benchmark's change against a baseline run.
+
+    Returns:
+        Names of benchmarks slower than the baseline by REGRESSION_THRESHOLD
+    """
+    regressions = []
+    print(f"\n{'benchmark':<60} {'baseline':>10} {'now':>10} {'ratio':>7}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before, now = baseline[name]["best_s"], result["best_s"]
+        ratio = now / before if before else float("inf")
+        flag = "  REGRESSION" if ratio > REGRESSION_THRESHOLD else ""
+        print(f"{name:<60} {before * 1000:>8.2f}ms {now * 1000:>8.2f}ms {ratio:>6.2f}x{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", nargs="+", choices=list(FIXTURE_SIZES), help="Fixtures to run (default: all)")
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark")
+    parser.add_argument("--output", default=None, help="Results file (default: results/<timestamp>.json)")
+    parser.add_argument("--compare", default=None, help="Earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    benchmarks = define_benchmarks(build_fixtures(args.fixtures))
+    results = {}
+    for name, func in benchmarks.items():
+        if args.filter not in name:
+            continue
+        results[name] = measure(func, args.repeat)
+        result = results[name]
+        print(f"{name:<60} best {result['best_s'] * 1000:>9.2f}ms  "
+              f"median {result['median_s'] * 1000:>9.2f}ms  peak {result['peak_mb']:>8.2f}MB")
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    with open(output, "w") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Tuple
+
+from components.indicator_kernels import KERNEL_COLUMNS, compute_indicator_arrays
+
+# Bars after a symbol's first price before each indicator has a value,
+# matching what the per-symbol pandas computation produces
+WARMUP_BARS = {
+    'SMA_20': 19,
+    'SMA_50': 49,
+    'SMA_200': 199,
+    'EMA_12': 0,
+    'EMA_26': 0,
+    'MACD': 0,
+    'Signal_Line': 0,
+    'MACD_Histogram': 0,
+    'RSI': 13,
+    'BB_Middle': 19,
+    'BB_Upper': 19,
+    'BB_Lower': 19,
+}
+
+
+def align_closes(frames: Dict[str, pd.DataFrame]) -> Tuple[List[str], pd.Index, np.ndarray]:
+    """
+    Align the close prices of several symbols into one 2-D array.
+
+    Dates are the union across symbols. Gaps inside a symbol's history are
+    forward-filled, so indicators computed on the result count those filled
+    bars; dates before its first price stay NaN.
+
+    Args:
+        frames: DataFrames with a Close column, keyed by symbol
+
+    Returns:
+        Tuple of (symbols, dates, closes) where closes is a C-contiguous
+        float64 array of shape (symbols, dates)
+    """
+    closes = {}
+    for symbol, frame in frames.items():
+        close = frame['Close']
+        if isinstance(close.index, pd.DatetimeIndex) and close.index.tz is not None:
+            # Daily bars from different exchanges line up on their local dates
+            close = close.tz_localize(None)
+        closes[symbol] = close
+    panel = pd.DataFrame(closes).sort_index().ffill()
+    return list(panel.columns), panel.index, np.ascontiguousarray(panel.to_numpy(dtype=np.float64).T)
+
+
+def compute_batch_indicators(closes: np.ndarray, columns: Iterable[str] = None,
+                             dtype=np.float64) -> Dict[str, np.ndarray]:
+    """
+    Compute chart indicators for every row of a (symbols x time) array at once.
+
+    Rows may start with NaN for symbols listed later than others; leading
+    gaps are masked, so they do not change a row's values. Gaps inside a row
+    are a different matter: align_closes forward-fills them, e.g. on another
+    exchange's holidays, and the indicators then count those filled bars.
+    A row only matches computing that symbol on its own history when the
+    symbols share trading calendars.
+
+    Args:
+        closes: Aligned close prices, as returned by align_closes
+        columns: Indicator column names; all kernel columns if None
+        dtype: Output dtype, float64 or float32
+
+    Returns:
+        Dictionary mapping each column to a (symbols x time) array
+    """
+    columns = list(KERNEL_COLUMNS if columns is None else columns)
+    closes = np.asarray(closes, dtype=np.float64)
+    n = closes.shape[-1]
+    if n == 0:
+        return {name: np.empty(closes.shape, dtype=dtype) for name in columns}
+
+    # Position of each row's first price; rows with no prices start at n
+    valid = ~np.isnan(closes)
+    starts = np.where(valid.any(axis=-1), valid.argmax(axis=-1), n)
+
+    # Back-fill the leading gap with the first price so kernels see no NaN;
+    # the affected positions are masked out below
+    first_prices = closes[np.arange(len(closes)), np.minimum(starts, n - 1)]
+    filled = np.where(valid, closes, np.nan_to_num(first_prices)[:, None])
+
+    results = compute_indicator_arrays(filled, columns, dtype=dtype)
+    positions = np.arange(n)
+    for name, values in results.items():
+        values[positions < (starts + WARMUP_BARS[name])[:, None]] = np.nan
+    return results
+
+
+def latest_indicator_values(frames: Dict[str, pd.DataFrame], columns: Iterable[str] = None) -> pd.DataFrame:
+    """
+    Latest indicator values for many symbols, e.g. for watchlist signal
+    columns or screeners.
+
+    Args:
+        frames: DataFrames with a Close column, keyed by symbol
+        columns: Indicator column names; all kernel columns if None
+
+    Returns:
+        DataFrame indexed by symbol with one column per indicator
+    """
+    symbols, _, closes = align_closes(frames)
+    results = compute_batch_indicators(closes, columns)
+    return pd.DataFrame({name: values[:, -1] for name, values in results.items()},
+                        index=pd.Index(symbols, name='symbol'))
@@ -1,125 +1,204 @@
+import streamlit as st
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+import base64
 import pandas as pd
 import numpy as np
+from typing import Iterable
+from components.indicators import INDICATOR_GROUPS, evaluate_indicators, group_columns
+from components.indicator_kernels import compute_indicator_arrays
+from components.downsample import DEFAULT_CHART_WIDTH, point_budget, bucket_starts, aggregate_ohlc, bucket_mean, downsample_line
 
-def calculate_technical_indicators(data: pd.DataFrame) -> pd.DataFrame:
+# Plotly template for each app theme
+CHART_TEMPLATES = {'light': "plotly_white", 'dark': "plotly_dark"}
+
+# Pixel height of each stock chart row, and of the title and margins around them
+ROW_HEIGHTS = {'price': 450, 'rsi': 130, 'macd': 130, 'volume': 170}
+CHART_MARGIN_HEIGHT = 120
+
+# Line traces longer than this are drawn with WebGL instead of SVG
+WEBGL_THRESHOLD = 1000
+
+# Trace attributes sent as binary typed arrays in the compact payload
+TYPED_ARRAY_KEYS = ('x', 'y', 'open', 'high', 'low', 'close')
+
+def compute_indicators(data: pd.DataFrame, indicators: Iterable[str], backend: str = 'pandas') -> pd.DataFrame:
+    """
+    Compute only the requested indicator groups for the given stock data.
+    
+    The groups are evaluated as one graph, so intermediates such as the
+    20-day rolling mean or the MACD EMAs are computed once and shared.
+    
+    Args:
+        data: DataFrame with OHLCV data
+        indicators: Indicator groups to compute, keys of INDICATOR_GROUPS
+        backend: 'pandas' for the indicator graph, or 'numpy' for the
+            array kernels, which match it to within about 1e-10
+        
+    Returns:
+        DataFrame with the requested indicator columns, aligned to data
+    """
+    columns = group_columns(indicators)
+    if backend == 'numpy':
+        arrays = compute_indicator_arrays(data['Close'].to_numpy(), columns)
+        return pd.DataFrame(arrays, index=data.index, copy=False)
+    if backend != 'pandas':
+        raise ValueError(f"Unknown indicator backend: {backend}")
+    return pd.DataFrame(evaluate_indicators(data, columns), index=data.index)
+
+def calculate_technical_indicators(data: pd.DataFrame, indicators: Iterable[str] = None) -> pd.DataFrame:
     """
     Calculate technical indicators for the given stock data.
     
     Args:
         data: DataFrame with OHLCV data
+        indicators: Indicator groups to compute; all of them if None
         
     Returns:
         DataFrame with technical indicators
     """
-    df = data.copy()
-    
-    # Simple Moving Averages
-    df['SMA_20'] = df['Close'].rolling(window=20).mean()
-    df['SMA_50'] = df['Close'].rolling(window=50).mean()
-    df['SMA_200'] = df['Close'].rolling(window=200).mean()
-    
-    # Exponential Moving Averages
-    df['EMA_12'] = df['Close'].ewm(span=12, adjust=False).mean()
-    df['EMA_26'] = df['Close'].ewm(span=26, adjust=False).mean()
-    
-    # MACD
-    df['MACD'] = df['EMA_12'] - df['EMA_26']
-    df['Signal_Line'] = df['MACD'].ewm(span=9, adjust=False).mean()
-    df['MACD_Histogram'] = df['MACD'] - df['Signal_Line']
-    
-    # RSI
-    delta = df['Close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-    rs = gain / loss
-    df['RSI'] = 100 - (100 / (1 + rs))
+    if indicators is None:
+        indicators = INDICATOR_GROUPS.keys()
+    return data.join(compute_indicators(data, indicators))
+
+def visible_range(data: pd.DataFrame, start=None, end=None) -> slice:
+    """
+    Positions of the bars between two dates, both inclusive.
     
-    # Bollinger Bands
-    df['BB_Middle'] = df['Close'].rolling(window=20).mean()
-    df['BB_Upper'] = df['BB_Middle'] + 2 * df['Close'].rolling(window=20).std()
-    df['BB_Lower'] = df['BB_Middle'] - 2 * df['Close'].rolling(window=20).std()
+    Args:
+        data: DataFrame indexed by timestamp
+        start: First date to include; from the beginning if None
+        end: Last date to include; to the end if None
+        
+    Returns:
+        Slice of row positions
+    """
+    def position(date, side):
+        timestamp = pd.Timestamp(date)
+        if data.index.tz is not None:
+            timestamp = timestamp.tz_localize(data.index.tz)
+        return data.index.searchsorted(timestamp, side=side)
     
-    return df
+    first = 0 if start is None else position(start, 'left')
+    last = len(data) if end is None else position(pd.Timestamp(end) + pd.Timedelta(days=1), 'left')
+    return slice(first, last)
 
-def create_stock_chart(data: pd.DataFrame, company_name: str, show_indicators: dict = None) -> go.Figure:
+def create_stock_chart(data: pd.DataFrame, company_name: str, show_indicators: dict = None,
+                       date_range: tuple = None, width: int = DEFAULT_CHART_WIDTH,
+                       theme: str = 'light', compact: bool = False) -> go.Figure:
     """
     Create an interactive stock chart using Plotly with technical indicators.
     
+    Long histories are reduced to what the plot width can show: candles and
+    volume are merged into wider bars and indicator lines are thinned with
+    LTTB. Indicators are always computed on the full history, so zooming in
+    with date_range shows the visible bars at full resolution.
+    
+    Only the subplot rows with content are created and the height follows
+    them. Lines longer than WEBGL_THRESHOLD points use WebGL traces;
+    candlesticks have no WebGL variant and are kept small by downsampling.
+    
     Args:
         data: DataFrame containing stock price data
         company_name: Name of the company
         show_indicators: Dictionary of indicators to show
+        date_range: Optional (start, end) dates to show
+        width: Plot width in pixels, used for the point budget
+        theme: App theme, 'light' or 'dark'
+        compact: Encode trace arrays as binary typed arrays, see
+            encode_typed_arrays
         
     Returns:
         Plotly figure object
     """
-    # Calculate indicators
-    df = calculate_technical_indicators(data)
+    # Calculate only the indicators that will be drawn
+    selected = [name for name, shown in (show_indicators or {}).items() if shown]
+    indicators = compute_indicators(data, selected)
+    if date_range is not None:
+        visible = visible_range(data, *date_range)
+        data = data.iloc[visible]
+        indicators = indicators.iloc[visible]
+    
+    # Reduce to the point budget of the plot width
+    max_candles, max_line_points = point_budget(width)
+    starts = bucket_starts(len(data), max_candles)
+    bars = aggregate_ohlc(data, starts)
     
-    # Create subplots - main chart, RSI, MACD, Volume
-    fig = make_subplots(rows=4, cols=1, 
+    # Only rows with content get a subplot; each keeps a fixed pixel height
+    show = show_indicators or {}
+    rows = ['price'] + [name for name in ('rsi', 'macd') if show.get(name)] + ['volume']
+    row = {name: i + 1 for i, name in enumerate(rows)}
+    heights = [ROW_HEIGHTS[name] for name in rows]
+    
+    # SVG slows down past a few thousand points per trace; WebGL does not
+    lines = {column: downsample_line(indicators[column], max_line_points)
+             for column in indicators.columns if column != 'MACD_Histogram'}
+    longest = max([len(values) for values in lines.values()], default=0)
+    Line = go.Scattergl if longest > WEBGL_THRESHOLD else go.Scatter
+    
+    def line(column, **kwargs):
+        values = lines[column]
+        return Line(x=values.index, y=values, **kwargs)
+    
+    fig = make_subplots(rows=len(rows), cols=1, 
                        shared_xaxes=True,
                        vertical_spacing=0.05,
-                       row_heights=[0.5, 0.15, 0.15, 0.2])
+                       row_heights=heights)
 
     # Candlestick chart
     fig.add_trace(
         go.Candlestick(
-            x=df.index,
-            open=df['Open'],
-            high=df['High'],
-            low=df['Low'],
-            close=df['Close'],
+            x=bars.index,
+            open=bars['Open'],
+            high=bars['High'],
+            low=bars['Low'],
+            close=bars['Close'],
             name='OHLC'
         ),
-        row=1, col=1
+        row=row['price'], col=1
     )
     
     # Add technical indicators if enabled
-    if show_indicators:
-        if show_indicators.get('sma'):
-            fig.add_trace(go.Scatter(x=df.index, y=df['SMA_20'], name='SMA 20', line=dict(color='blue')), row=1, col=1)
-            fig.add_trace(go.Scatter(x=df.index, y=df['SMA_50'], name='SMA 50', line=dict(color='orange')), row=1, col=1)
-            fig.add_trace(go.Scatter(x=df.index, y=df['SMA_200'], name='SMA 200', line=dict(color='red')), row=1, col=1)
-        
-        if show_indicators.get('bollinger'):
-            fig.add_trace(go.Scatter(x=df.index, y=df['BB_Upper'], name='BB Upper', line=dict(color='gray', dash='dash')), row=1, col=1)
-            fig.add_trace(go.Scatter(x=df.index, y=df['BB_Lower'], name='BB Lower', line=dict(color='gray', dash='dash')), row=1, col=1)
-            fig.add_trace(go.Scatter(x=df.index, y=df['BB_Middle'], name='BB Middle', line=dict(color='gray')), row=1, col=1)
-        
-        if show_indicators.get('rsi'):
-            fig.add_trace(go.Scatter(x=df.index, y=df['RSI'], name='RSI', line=dict(color='purple')), row=2, col=1)
-            fig.add_hline(y=70, line_dash="dash", line_color="red", row=2)
-            fig.add_hline(y=30, line_dash="dash", line_color="green", row=2)
-        
-        if show_indicators.get('macd'):
-            fig.add_trace(go.Scatter(x=df.index, y=df['MACD'], name='MACD', line=dict(color='blue')), row=3, col=1)
-            fig.add_trace(go.Scatter(x=df.index, y=df['Signal_Line'], name='Signal Line', line=dict(color='orange')), row=3, col=1)
-            fig.add_trace(go.Bar(x=df.index, y=df['MACD_Histogram'], name='MACD Histogram'), row=3, col=1)
+    if show.get('sma'):
+        fig.add_trace(line('SMA_20', name='SMA 20', line=dict(color='blue')), row=row['price'], col=1)
+        fig.add_trace(line('SMA_50', name='SMA 50', line=dict(color='orange')), row=row['price'], col=1)
+        fig.add_trace(line('SMA_200', name='SMA 200', line=dict(color='red')), row=row['price'], col=1)
+    
+    if show.get('bollinger'):
+        fig.add_trace(line('BB_Upper', name='BB Upper', line=dict(color='gray', dash='dash')), row=row['price'], col=1)
+        fig.add_trace(line('BB_Lower', name='BB Lower', line=dict(color='gray', dash='dash')), row=row['price'], col=1)
+        fig.add_trace(line('BB_Middle', name='BB Middle', line=dict(color='gray')), row=row['price'], col=1)
+    
+    if show.get('rsi'):
+        fig.add_trace(line('RSI', name='RSI', line=dict(color='purple')), row=row['rsi'], col=1)
+        fig.add_hline(y=70, line_dash="dash", line_color="red", row=row['rsi'])
+        fig.add_hline(y=30, line_dash="dash", line_color="green", row=row['rsi'])
+        fig.update_yaxes(title_text="RSI", range=[0, 100], row=row['rsi'], col=1)
+    
+    if show.get('macd'):
+        fig.add_trace(line('MACD', name='MACD', line=dict(color='blue')), row=row['macd'], col=1)
+        fig.add_trace(line('Signal_Line', name='Signal Line', line=dict(color='orange')), row=row['macd'], col=1)
+        fig.add_trace(go.Bar(x=bars.index, y=bucket_mean(indicators['MACD_Histogram'], starts), name='MACD Histogram'),
+                      row=row['macd'], col=1)
+        fig.update_yaxes(title_text="MACD", row=row['macd'], col=1)
 
     # Volume bar chart
     fig.add_trace(
         go.Bar(
-            x=df.index,
-            y=df['Volume'],
+            x=bars.index,
+            y=bars['Volume'],
             name='Volume'
         ),
-        row=4, col=1
+        row=row['volume'], col=1
     )
 
     # Update layout
     fig.update_layout(
         title=f"{company_name} Stock Price",
-        yaxis_title="Price ($)",
-        yaxis2_title="RSI",
-        yaxis3_title="MACD",
-        yaxis4_title="Volume",
         xaxis_rangeslider_visible=False,
-        height=1000,
+        height=CHART_MARGIN_HEIGHT + sum(heights),
         showlegend=True,
-        template="plotly_white"
+        template=CHART_TEMPLATES.get(theme, "plotly_white")
     )
 
     # Add range selector
@@ -136,16 +215,111 @@ def create_stock_chart(data: pd.DataFrame, company_name: str, show_indicators: d
         )
     )
 
-    # Update y-axis labels and ranges
-    fig.update_yaxes(title_text="Price ($)", row=1, col=1)
-    if show_indicators and show_indicators.get('rsi'):
-        fig.update_yaxes(title_text="RSI", range=[0, 100], row=2, col=1)
-    if show_indicators and show_indicators.get('macd'):
-        fig.update_yaxes(title_text="MACD", row=3, col=1)
-    fig.update_yaxes(title_text="Volume", row=4, col=1)
+    # Update y-axis labels
+    fig.update_yaxes(title_text="Price ($)", row=row['price'], col=1)
+    fig.update_yaxes(title_text="Volume", row=row['volume'], col=1)
 
+    if compact:
+        return encode_typed_arrays(fig)
     return fig
 
+def _typed_array(values: np.ndarray, dtype: str) -> dict:
+    """Plotly.js typed array spec: little-endian values, base64 encoded"""
+    values = np.ascontiguousarray(values, dtype='<' + dtype)
+    return {'dtype': dtype, 'bdata': base64.b64encode(values.tobytes()).decode('ascii')}
+
+def _array_dtype(values: np.ndarray) -> str:
+    """
+    Smallest typed array dtype that holds every value exactly: uint32 for
+    whole numbers such as volumes when they fit, float64 otherwise.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if (len(values) and np.isfinite(values).all() and (values >= 0).all()
+            and values.max() <= np.iinfo(np.uint32).max and (values == np.round(values)).all()):
+        return 'u4'
+    return 'f8'
+
+def encode_typed_arrays(fig: go.Figure) -> go.Figure:
+    """
+    Shrink a figure's payload by sending its data arrays as binary typed
+    arrays instead of JSON number lists.
+    
+    Values are stored exactly: whole numbers that fit, such as volumes, as
+    uint32 and everything else as float64. Timestamps become float64
+    milliseconds of their local wall-clock time on a date axis, so they
+    display as in the data. Plotly.js decodes these arrays natively;
+    plotly.py 5 cannot validate them, so the encoded figure is built
+    without validation and must not be edited afterwards.
+    
+    Args:
+        fig: Figure whose traces have date x values
+        
+    Returns:
+        New figure with the encoded arrays; fig is left unchanged
+    """
+    spec = fig.to_plotly_json()
+    traces = []
+    for trace in spec['data']:
+        trace = dict(trace)
+        for key in TYPED_ARRAY_KEYS:
+            values = trace.get(key)
+            if not isinstance(values, np.ndarray):
+                continue
+            if key == 'x':
+                dates = pd.DatetimeIndex(values)
+                if dates.tz is not None:
+                    dates = dates.tz_localize(None)
+                trace[key] = _typed_array(dates.to_numpy(dtype='datetime64[ms]').astype(np.int64), 'f8')
+            else:
+                trace[key] = _typed_array(values, _array_dtype(values))
+        traces.append(trace)
+    layout = spec['layout']
+    for name in list(layout):
+        if name.startswith('xaxis'):
+            layout[name] = {**layout[name], 'type': 'date'}
+    return go.Figure({'data': traces, 'layout': layout}, _validate=False)
+
+def data_version(data: pd.DataFrame) -> tuple:
+    """
+    Cheap fingerprint of a price history that changes when bars are added,
+    the latest bar is revised or the history is rewritten, e.g. after a split.
+    
+    Args:
+        data: DataFrame containing stock price data
+        
+    Returns:
+        Hashable tuple identifying this version of the data
+    """
+    if data.empty:
+        return (0,)
+    return (len(data), data.index[0], data.index[-1],
+            tuple(data.iloc[0].tolist()), tuple(data.iloc[-1].tolist()))
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def get_stock_chart(symbol: str, period: str, version: tuple, show_indicators: dict, theme: str,
+                    date_range: tuple, company_name: str, _data: pd.DataFrame) -> go.Figure:
+    """
+    Build the stock chart once per (symbol, period, data version, indicators,
+    theme, zoom) and reuse it on reruns triggered by unrelated widgets.
+    
+    The figure is shared between sessions, so callers must not modify it.
+    
+    Args:
+        symbol: Stock symbol
+        period: Time period of the data
+        version: data_version of _data
+        show_indicators: Dictionary of indicators to show
+        theme: App theme, 'light' or 'dark'
+        date_range: Optional (start, end) dates to show
+        company_name: Name of the company
+        _data: DataFrame containing stock price data; not hashed, version
+            stands in for it
+        
+    Returns:
+        Plotly figure object
+    """
+    return create_stock_chart(_data, company_name, show_indicators, date_range, theme=theme, compact=True)
+
 def create_dividend_chart(dividend_data: pd.DataFrame, company_name: str) -> go.Figure:
     """
     Create an interactive dividend history chart using Plotly.
@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+from typing import Tuple
+
+# Plot width assumed when the caller does not know it; wide layout on a laptop screen
+DEFAULT_CHART_WIDTH = 1200
+
+# Narrowest readable candle, and line points drawn per horizontal pixel
+PIXELS_PER_CANDLE = 2
+LINE_POINTS_PER_PIXEL = 2
+
+
+def point_budget(width: int = DEFAULT_CHART_WIDTH) -> Tuple[int, int]:
+    """
+    Number of candles and line points worth drawing on a chart.
+
+    Args:
+        width: Plot width in pixels
+
+    Returns:
+        Tuple of (max_candles, max_line_points)
+    """
+    return max(width // PIXELS_PER_CANDLE, 1), max(width * LINE_POINTS_PER_PIXEL, 3)
+
+
+def bucket_starts(n: int, max_buckets: int) -> np.ndarray:
+    """
+    Start positions of consecutive, equally sized buckets covering n bars.
+
+    Args:
+        n: Number of bars
+        max_buckets: Largest number of buckets wanted
+
+    Returns:
+        Array of bucket start positions; one bucket per bar if n fits
+    """
+    size = max(-(-n // max_buckets), 1)
+    return np.arange(0, n, size)
+
+
+def aggregate_ohlc(data: pd.DataFrame, starts: np.ndarray) -> pd.DataFrame:
+    """
+    Merge consecutive OHLCV bars into wider bars.
+
+    Each bucket opens at its first bar's open, closes at its last bar's
+    close and spans the highest high and lowest low, so no price extreme
+    is lost. Volume is summed.
+
+    Args:
+        data: DataFrame with Open, High, Low, Close and Volume columns
+        starts: Bucket start positions, as returned by bucket_starts
+
+    Returns:
+        DataFrame with one row per bucket, indexed by its first timestamp
+    """
+    if len(starts) == len(data):
+        return data
+    stops = np.append(starts[1:], len(data)) - 1
+    return pd.DataFrame({
+        'Open': data['Open'].to_numpy()[starts],
+        'High': np.fmax.reduceat(data['High'].to_numpy(), starts),
+        'Low': np.fmin.reduceat(data['Low'].to_numpy(), starts),
+        'Close': data['Close'].to_numpy()[stops],
+        'Volume': np.add.reduceat(np.nan_to_num(data['Volume'].to_numpy(dtype=np.float64)), starts),
+    }, index=data.index[starts])
+
+
+def bucket_mean(values: pd.Series, starts: np.ndarray) -> pd.Series:
+    """Average a series over the same buckets as aggregate_ohlc, ignoring NaN"""
+    if len(starts) == len(values):
+        return values
+    array = values.to_numpy(dtype=np.float64)
+    valid = ~np.isnan(array)
+    totals = np.add.reduceat(np.where(valid, array, 0.0), starts)
+    counts = np.add.reduceat(valid.astype(np.float64), starts)
+    with np.errstate(invalid='ignore'):
+        return pd.Series(totals / counts, index=values.index[starts], name=values.name)
+
+
+def lttb_indices(y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets selection of the points that best keep
+    the visual shape of a line.
+
+    The first and last points are always kept. The rest are split into
+    threshold - 2 buckets and each bucket keeps the point forming the
+    largest triangle with the previously kept point and the average of the
+    next bucket. Points are taken as evenly spaced, which matches trading
+    bars drawn on a chart.
+
+    Args:
+        y: Values without NaN
+        threshold: Number of points to keep
+
+    Returns:
+        Sorted positions of the kept points
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Bucket i covers [edges[i], edges[i + 1]); the last point is a bucket of its own
+    edges = np.append(np.linspace(1, n - 1, threshold - 1).astype(np.intp), n)
+    x = np.arange(n, dtype=np.float64)
+    sizes = np.diff(edges)
+    mean_x = np.add.reduceat(x, edges[:-1]) / sizes
+    mean_y = np.add.reduceat(y, edges[:-1]) / sizes
+
+    selected = np.empty(threshold, dtype=np.intp)
+    selected[0] = 0
+    a = 0
+    for i in range(threshold - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_x, next_y = mean_x[i + 1], mean_y[i + 1]
+        # Twice the triangle area between a, each candidate and the next bucket's average
+        areas = np.abs((x[a] - next_x) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (next_y - y[a]))
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+    selected[-1] = n - 1
+    return selected
+
+
+def downsample_line(values: pd.Series, threshold: int) -> pd.Series:
+    """
+    Reduce a line series to at most threshold points with LTTB.
+
+    When reducing, NaN values such as an indicator's warm-up period are
+    dropped first since they are not drawn anyway.
+
+    Args:
+        values: Series to reduce
+        threshold: Largest number of points to keep
+
+    Returns:
+        Series with the kept points and their original index
+    """
+    if len(values) <= threshold:
+        return values
+    values = values.dropna()
+    if len(values) <= threshold:
+        return values
+    return values.iloc[lttb_indices(values.to_numpy(dtype=np.float64), threshold)]
@@ -1,8 +1,8 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import random
 from datetime import datetime, timedelta
+from services.market_data import get_provider
 
 def run_price_prediction_game(symbol: str):
     """
@@ -33,8 +33,7 @@ def run_price_prediction_game(symbol: str):
     
     # Get historical data
     try:
-        stock = yf.Ticker(symbol)
-        hist = stock.history(period='1mo', interval='1d')
+        hist = get_provider().history(symbol, period='1mo', interval='1d')
         
         if not hist.empty:
             # Display current score and streak
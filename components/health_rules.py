@@ -0,0 +1,176 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, NamedTuple, Tuple
+
+
+class HealthRule(NamedTuple):
+    """
+    How one metric contributes to the health score.
+
+    The metric's value is mapped to a 0-1 sub-score by linear interpolation
+    between the breakpoints, clamped at both ends.
+    """
+    breakpoints: Tuple[float, ...]
+    scores: Tuple[float, ...]
+    weight: float
+    strength: str
+    risk: str
+    negative_score: float = None  # Sub-score for negative values, e.g. a P/E from losses
+    negative_risk: str = None  # Risk text for negative values, if it differs
+    log_scale: bool = False  # Interpolate on log10 of the value
+
+
+# Rules keyed by the health context field they read. debt_to_equity and
+# dividend_yield are in percent as Yahoo reports them; margins and returns
+# are fractions.
+HEALTH_RULES: Dict[str, HealthRule] = {
+    'profit_margins': HealthRule((-0.1, 0, 0.05, 0.15, 0.25), (0, 0.2, 0.5, 0.8, 1), 2.0,
+                                 "Healthy profit margin of {:.1%}", "Thin profit margin of {:.1%}",
+                                 negative_risk="Loss-making with a profit margin of {:.1%}"),
+    'return_on_equity': HealthRule((-0.05, 0, 0.08, 0.15, 0.25), (0, 0.2, 0.5, 0.8, 1), 2.0,
+                                   "Strong return on equity of {:.1%}", "Weak return on equity of {:.1%}",
+                                   negative_risk="Negative return on equity of {:.1%}"),
+    'debt_to_equity': HealthRule((0, 50, 100, 200, 300), (1, 0.8, 0.6, 0.3, 0), 1.5,
+                                 "Low debt at {:.0f}% of equity", "High debt at {:.0f}% of equity",
+                                 negative_score=0, negative_risk="Negative shareholder equity"),
+    'current_ratio': HealthRule((0.5, 1, 1.5, 2, 3), (0, 0.4, 0.7, 0.9, 1), 1.5,
+                                "Solid liquidity with a current ratio of {:.2f}",
+                                "Tight liquidity with a current ratio of {:.2f}"),
+    'pe_ratio': HealthRule((5, 15, 25, 40, 80), (0.8, 1, 0.7, 0.4, 0), 1.0,
+                           "Reasonable valuation at {:.1f}x earnings", "Rich valuation at {:.1f}x earnings",
+                           negative_score=0, negative_risk="Negative trailing earnings"),
+    'forward_pe': HealthRule((5, 15, 25, 40, 80), (0.8, 1, 0.7, 0.4, 0), 0.5,
+                             "Reasonable forward valuation at {:.1f}x earnings",
+                             "Rich forward valuation at {:.1f}x earnings", negative_score=0,
+                             negative_risk="Losses expected over the next year"),
+    'price_to_book': HealthRule((0, 1, 3, 6, 15), (0.8, 1, 0.7, 0.4, 0.1), 0.5,
+                                "Modest price to book of {:.2f}", "High price to book of {:.2f}",
+                                negative_score=0, negative_risk="Negative book value"),
+    'beta': HealthRule((0, 0.8, 1.2, 1.8, 2.5), (0.8, 1, 0.8, 0.4, 0.1), 0.5,
+                       "Moderate volatility with a beta of {:.2f}", "High volatility with a beta of {:.2f}"),
+    'dividend_yield': HealthRule((0, 1, 3, 6, 10), (0.5, 0.7, 1, 0.8, 0.4), 0.5,
+                                 "Dividend yield of {:.2f}%", "Possibly unsustainable dividend yield of {:.2f}%"),
+    'market_cap': HealthRule((8, 9, 10, 11, 12), (0.1, 0.3, 0.6, 0.9, 1), 0.5,
+                             "Large, established company (${:,.0f} market cap)",
+                             "Small company (${:,.0f} market cap)", log_scale=True),
+}
+
+# Sub-scores at or above / at or below these count as a strength / a risk
+STRENGTH_THRESHOLD = 0.75
+RISK_THRESHOLD = 0.3
+
+# Most strengths and risks listed per company
+MAX_FINDINGS = 3
+
+# Score given when none of the metrics are available
+NEUTRAL_SCORE = 50
+
+
+def metric_values(contexts: pd.DataFrame) -> pd.DataFrame:
+    """
+    Numeric value of every scored metric, one column per rule.
+
+    Args:
+        contexts: One row per company with health context fields as columns;
+            non-numeric values such as 'N/A' count as missing
+
+    Returns:
+        Float DataFrame with the same index, NaN where a metric is missing
+    """
+    return pd.DataFrame({
+        field: pd.to_numeric(contexts[field], errors='coerce') if field in contexts else np.nan
+        for field in HEALTH_RULES
+    }, index=contexts.index, dtype=np.float64)
+
+
+def rule_scores(values: pd.DataFrame) -> pd.DataFrame:
+    """
+    Score every metric of every company, one vectorized pass per rule.
+
+    Args:
+        values: Metric values as returned by metric_values
+
+    Returns:
+        DataFrame of 0-1 sub-scores with the same index, NaN where the metric
+        is missing
+    """
+    scores = {}
+    for field, rule in HEALTH_RULES.items():
+        column = values[field].to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x = np.log10(column) if rule.log_scale else column
+        score = np.interp(x, rule.breakpoints, rule.scores)
+        if rule.negative_score is not None:
+            score = np.where(column < 0, rule.negative_score, score)
+        scores[field] = np.where(np.isnan(column), np.nan, score)
+    return pd.DataFrame(scores, index=values.index)
+
+
+def score_health(contexts: pd.DataFrame) -> pd.DataFrame:
+    """
+    Rule-based financial health scores for many companies at once.
+
+    The score is the weighted average of the available metrics' sub-scores,
+    scaled to 0-100; metrics a company does not report are left out of its
+    average rather than counted as bad. Strengths and risks are the metrics
+    furthest from neutral, weighted by importance.
+
+    Args:
+        contexts: One row per company with health context fields as columns
+
+    Returns:
+        DataFrame with the same index and score, strengths, risks and
+        metrics_used columns
+    """
+    values = metric_values(contexts)
+    scores = rule_scores(values).to_numpy()
+    weights = np.array([rule.weight for rule in HEALTH_RULES.values()])
+    available = ~np.isnan(scores)
+    weighted = np.where(available, scores * weights, 0.0).sum(axis=1)
+    total_weight = (available * weights).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        score = np.where(total_weight > 0, 100 * weighted / total_weight, NEUTRAL_SCORE)
+
+    significance = np.abs(scores - 0.5) * weights
+    values = values.to_numpy()
+    return pd.DataFrame({
+        'score': np.round(score).astype(int),
+        'strengths': _findings(values, significance, scores >= STRENGTH_THRESHOLD, 'strength'),
+        'risks': _findings(values, significance, scores <= RISK_THRESHOLD, 'risk'),
+        'metrics_used': available.sum(axis=1),
+    }, index=contexts.index)
+
+
+def _findings(values: np.ndarray, significance: np.ndarray, selected: np.ndarray, kind: str) -> List[List[str]]:
+    """Describe each company's most significant selected metrics"""
+    ranked = np.argsort(np.where(selected, -significance, np.inf), axis=1, kind='stable')[:, :MAX_FINDINGS]
+    counts = np.minimum(selected.sum(axis=1), MAX_FINDINGS)
+    rules = list(HEALTH_RULES.values())
+
+    def describe(rule: HealthRule, value: float) -> str:
+        text = getattr(rule, kind)
+        if kind == 'risk' and value < 0 and rule.negative_risk:
+            text = rule.negative_risk
+        return text.format(value)
+
+    return [[describe(rules[j], values[i, j]) for j in ranked[i, :counts[i]]] for i in range(len(values))]
+
+
+def local_health_score(context: dict) -> dict:
+    """
+    Rule-based health score for one company, in the same shape as the AI
+    health score so display_health_score can render either.
+
+    Args:
+        context: Health context as returned by build_health_context
+
+    Returns:
+        Dictionary with score, analysis, strengths and risks
+    """
+    result = score_health(pd.DataFrame([context])).iloc[0]
+    return {
+        'score': int(result['score']),
+        'analysis': f"Rule-based score from {result['metrics_used']} of {len(HEALTH_RULES)} key metrics.",
+        'strengths': result['strengths'],
+        'risks': result['risks'],
+    }
@@ -1,85 +1,256 @@
 import streamlit as st
-import yfinance as yf
 from openai import OpenAI
 import json
 import os
+import math
+import time
+import hashlib
+import threading
+import pandas as pd
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Tuple
+from utils import get_ticker_info, submit_with_context, fetch_concurrently
+from services.cache import SQLiteBackend, SingleFlight
+from components.health_rules import local_health_score, score_health
 
 client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
 
-@st.cache_data(ttl=3600)
-def calculate_health_score(symbol: str) -> dict:
+# Part of every stored score's key, as are the prompt text and model; bump it
+# to regenerate all stored scores, e.g. after changing how answers are parsed
+PROMPT_VERSION = "1"
+HEALTH_SCORE_MODEL = "gpt-4"  # Using GPT-4 for reliable financial analysis
+
+# Significant digits kept for context values. Valuation figures move with
+# the share price on every quote; rounding them means a score is only
+# regenerated when the fundamentals meaningfully change.
+CONTEXT_SIGNIFICANT_DIGITS = 2
+
+# Persistent store of generated scores, keyed by a hash of their input
+HEALTH_SCORE_CACHE_PATH = os.environ.get("HEALTH_SCORE_CACHE_PATH",
+                                         os.path.join(".cache", "health_scores.sqlite3"))
+
+SYSTEM_PROMPT = """You are a financial analyst expert. Analyze the given metrics and provide your response in the following strict JSON format:
+                {
+                    "score": <number between 0-100>,
+                    "analysis": "<brief analysis in max 100 words>",
+                    "strengths": ["<strength1>", "<strength2>", "<strength3>"],
+                    "risks": ["<risk1>", "<risk2>", "<risk3>"]
+                }
+                
+                IMPORTANT: Ensure the response is valid JSON with these exact keys."""
+
+# Concurrent AI analyses per process. They run on their own pool so
+# multi-second model calls never hold the workers market data fetches use.
+AI_ANALYSIS_WORKERS = 2
+
+_score_store: Optional[SQLiteBackend] = None
+_score_store_lock = threading.Lock()
+_score_flight = SingleFlight()
+_analysis_pool = ThreadPoolExecutor(max_workers=AI_ANALYSIS_WORKERS, thread_name_prefix="ai-analysis")
+
+def _round_significant(value):
+    """Round a number to CONTEXT_SIGNIFICANT_DIGITS; other values pass through"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value) or value == 0:
+        return value
+    digits = CONTEXT_SIGNIFICANT_DIGITS - 1 - math.floor(math.log10(abs(value)))
+    rounded = round(value, digits)
+    return int(rounded) if digits <= 0 else rounded
+
+def build_health_context(symbol: str) -> dict:
     """
-    Calculate a financial health score using AI analysis of stock metrics.
+    Collect the metrics the health score is based on.
     
     Args:
         symbol: Stock symbol
         
     Returns:
-        Dictionary containing health score and analysis
+        Dictionary of metrics, numbers rounded to CONTEXT_SIGNIFICANT_DIGITS
     """
-    try:
-        stock = yf.Ticker(symbol)
-        info = stock.info
+    info = get_ticker_info(symbol)
+    context = {
+        "symbol": symbol,
+        "company_name": info.get("longName", symbol),
+        "market_cap": info.get("marketCap", "N/A"),
+        "pe_ratio": info.get("trailingPE", "N/A"),
+        "forward_pe": info.get("forwardPE", "N/A"),
+        "price_to_book": info.get("priceToBook", "N/A"),
+        "debt_to_equity": info.get("debtToEquity", "N/A"),
+        "current_ratio": info.get("currentRatio", "N/A"),
+        "return_on_equity": info.get("returnOnEquity", "N/A"),
+        "profit_margins": info.get("profitMargins", "N/A"),
+        "beta": info.get("beta", "N/A"),
+        "dividend_yield": info.get("dividendYield", "N/A")  # Percent, as in the metrics table
+    }
+    return {key: _round_significant(value) for key, value in context.items()}
+
+def health_context_key(context: dict) -> str:
+    """
+    Content address of a health score request.
+    
+    Args:
+        context: Metrics as returned by build_health_context
         
-        # Prepare financial context for AI analysis
-        context = {
-            "symbol": symbol,
-            "company_name": info.get("longName", symbol),
-            "market_cap": info.get("marketCap", "N/A"),
-            "pe_ratio": info.get("trailingPE", "N/A"),
-            "forward_pe": info.get("forwardPE", "N/A"),
-            "price_to_book": info.get("priceToBook", "N/A"),
-            "debt_to_equity": info.get("debtToEquity", "N/A"),
-            "current_ratio": info.get("currentRatio", "N/A"),
-            "return_on_equity": info.get("returnOnEquity", "N/A"),
-            "profit_margins": info.get("profitMargins", "N/A"),
-            "beta": info.get("beta", "N/A"),
-            "dividend_yield": info.get("dividendYield", "N/A")
-        }
+    Returns:
+        SHA-256 hex digest of the prompt, its version, the model and the context
+    """
+    payload = json.dumps({"prompt_version": PROMPT_VERSION, "prompt": SYSTEM_PROMPT,
+                          "model": HEALTH_SCORE_MODEL, "context": context},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _get_score_store() -> Optional[SQLiteBackend]:
+    """Open the persistent score store on first use; None if it cannot be opened"""
+    global _score_store
+    with _score_store_lock:
+        if _score_store is None:
+            try:
+                _score_store = SQLiteBackend(HEALTH_SCORE_CACHE_PATH)
+            except Exception:
+                return None
+    return _score_store
+
+def request_health_score(context: dict) -> dict:
+    """
+    Ask the AI model for a financial health score.
+    
+    Args:
+        context: Metrics as returned by build_health_context
         
-        # Request AI analysis
-        response = client.chat.completions.create(
-            model="gpt-4",  # Using GPT-4 for reliable financial analysis
-            messages=[
-                {
-                    "role": "system",
-                    "content": """You are a financial analyst expert. Analyze the given metrics and provide your response in the following strict JSON format:
-                    {
-                        "score": <number between 0-100>,
-                        "analysis": "<brief analysis in max 100 words>",
-                        "strengths": ["<strength1>", "<strength2>", "<strength3>"],
-                        "risks": ["<risk1>", "<risk2>", "<risk3>"]
-                    }
-                    
-                    IMPORTANT: Ensure the response is valid JSON with these exact keys."""
-                },
-                {
-                    "role": "user",
-                    "content": f"Analyze this company's financial health: {json.dumps(context)}"
-                }
-            ]
-        )
+    Returns:
+        Dictionary containing health score and analysis
         
-        try:
-            content = response.choices[0].message.content.strip()
-            # Remove any markdown formatting if present
-            if content.startswith("```json"):
-                content = content[7:-3].strip()
-            elif content.startswith("```"):
-                content = content[3:-3].strip()
-            return json.loads(content)
-        except json.JSONDecodeError as e:
-            st.error(f"Error parsing AI response: {str(e)}")
-            return {
-                "score": 50,
-                "analysis": "Error processing financial health score.",
-                "strengths": ["Data unavailable"],
-                "risks": ["Data unavailable"]
+    Raises:
+        json.JSONDecodeError: If the model response is not valid JSON
+    """
+    response = client.chat.completions.create(
+        model=HEALTH_SCORE_MODEL,
+        messages=[
+            {
+                "role": "system",
+                "content": SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": f"Analyze this company's financial health: {json.dumps(context)}"
             }
+        ]
+    )
+    
+    content = response.choices[0].message.content.strip()
+    # Remove any markdown formatting if present
+    if content.startswith("```json"):
+        content = content[7:-3].strip()
+    elif content.startswith("```"):
+        content = content[3:-3].strip()
+    return json.loads(content)
+
+def get_health_score(symbol: str) -> dict:
+    """
+    Return the health score for a symbol's current metrics, asking the AI
+    model only if these exact metrics have not been scored before.
+    
+    Scores are stored persistently under health_context_key, so they are
+    shared by every worker and survive restarts. Concurrent requests for
+    the same metrics share one model call.
+    
+    Args:
+        symbol: Stock symbol
+        
+    Returns:
+        Dictionary containing health score and analysis
+        
+    Raises:
+        json.JSONDecodeError: If the model response is not valid JSON
+    """
+    context = build_health_context(symbol)
+    key = health_context_key(context)
+    store = _get_score_store()
+    
+    def score():
+        if store is not None:
+            try:
+                stored = store.get("health_score", key)
+                if stored is not None:
+                    return stored[0]
+            except Exception:
+                pass
+        result = request_health_score(context)
+        if store is not None:
+            try:
+                store.set("health_score", key, result, time.time())
+            except Exception:
+                # The store is an optimisation; never fail a score on it
+                pass
+        return result
+    
+    return _score_flight.do(key, score)
+
+def calculate_health_score(symbol: str) -> dict:
+    """
+    Calculate a financial health score from the stock's metrics with the
+    local rule-based scorer, which answers without a model round trip.
+    
+    Args:
+        symbol: Stock symbol
+        
+    Returns:
+        Dictionary containing health score and analysis
+    """
+    try:
+        return local_health_score(build_health_context(symbol))
     except Exception as e:
         st.error(f"Error calculating health score: {str(e)}")
         return None
 
+def score_symbols(symbols: Tuple[str, ...]) -> pd.DataFrame:
+    """
+    Rule-based health scores for several symbols at once, e.g. a watchlist.
+    
+    Args:
+        symbols: Stock symbols
+        
+    Returns:
+        DataFrame indexed by symbol as returned by score_health; symbols
+        whose metrics could not be fetched are left out
+    """
+    contexts = fetch_concurrently(build_health_context, symbols)
+    contexts = {symbol: context for symbol, context in contexts.items() if not isinstance(context, Exception)}
+    return score_health(pd.DataFrame.from_dict(contexts, orient='index'))
+
+def start_ai_analysis(symbol: str) -> Future:
+    """
+    Start the AI health analysis in the background, on the analysis pool
+    rather than the shared fetch pool.
+    
+    Args:
+        symbol: Stock symbol
+        
+    Returns:
+        Future resolving to the AI health score dictionary
+    """
+    return submit_with_context(_analysis_pool, get_health_score, symbol)
+
+def display_ai_analysis(analysis: Future):
+    """
+    Wait for a started AI health analysis and display its narrative.
+    
+    Args:
+        analysis: Future returned by start_ai_analysis
+    """
+    try:
+        score_data = analysis.result()
+    except json.JSONDecodeError as e:
+        st.error(f"Error parsing AI response: {str(e)}")
+        return
+    except Exception as e:
+        st.error(f"Error generating AI analysis: {str(e)}")
+        return
+    
+    st.markdown("### AI Analysis")
+    st.write(score_data.get('analysis', ''))
+    if 'score' in score_data:
+        st.caption(f"AI model score: {score_data['score']}/100")
+
 def display_health_score(score_data: dict):
     """
     Display the financial health score and analysis in the Streamlit app.
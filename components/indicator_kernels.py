@@ -0,0 +1,319 @@
+import math
+import numpy as np
+
+# Every kernel works along the last axis, so a 2-D (symbols x time) array
+# computes the indicator for all symbols in one call.
+from typing import Dict, Iterable, Optional, Tuple
+
+# Indicator columns the kernels can produce, in the chart's column order
+KERNEL_COLUMNS = [
+    'SMA_20', 'SMA_50', 'SMA_200', 'EMA_12', 'EMA_26', 'MACD', 'Signal_Line',
+    'MACD_Histogram', 'RSI', 'BB_Middle', 'BB_Upper', 'BB_Lower',
+]
+
+# Exponent bound for the blocked EMA so rescaled terms stay inside float64
+_EMA_MAX_EXPONENT = 250 * math.log(10)
+
+
+def _as_array(x, dtype) -> np.ndarray:
+    """Return x as a contiguous array of the working dtype"""
+    return np.ascontiguousarray(x, dtype=dtype)
+
+
+def _output(shape: tuple, dtype, out: Optional[np.ndarray]) -> np.ndarray:
+    """Return the caller's output buffer, or allocate one"""
+    if out is None:
+        return np.empty(shape, dtype=dtype)
+    if out.shape != shape:
+        raise ValueError(f"Output buffer has shape {out.shape}, expected {shape}")
+    return out
+
+
+def _window_sums(x: np.ndarray, window: int) -> np.ndarray:
+    """
+    Sums of every full window of x along the last axis, computed from one
+    cumulative sum.
+
+    Each row is shifted by its mean first to keep the cumulative sum small,
+    and accumulation always happens in float64. Windows containing NaN are
+    NaN, as in pandas, without affecting the windows around them.
+    """
+    n = x.shape[-1]
+    missing = np.isnan(x)
+    has_missing = bool(missing.any())
+    if has_missing:
+        counts = np.maximum(np.sum(~missing, axis=-1, keepdims=True), 1)
+        shift = np.sum(np.where(missing, 0.0, x), axis=-1, keepdims=True) / counts
+    else:
+        shift = np.mean(x, axis=-1, keepdims=True) if n else np.zeros(x.shape[:-1] + (1,))
+    cumulative = np.empty(x.shape[:-1] + (n + 1,), dtype=np.float64)
+    cumulative[..., 0] = 0.0
+    shifted = np.where(missing, 0.0, x - shift) if has_missing else x - shift
+    np.cumsum(shifted, axis=-1, dtype=np.float64, out=cumulative[..., 1:])
+    sums = cumulative[..., window:] - cumulative[..., :-window] + shift * window
+    if has_missing:
+        gaps = np.zeros(cumulative.shape, dtype=np.int64)
+        np.cumsum(missing, axis=-1, out=gaps[..., 1:])
+        sums[gaps[..., window:] > gaps[..., :-window]] = np.nan
+    return sums
+
+
+def rolling_mean(x, window: int, dtype=np.float64, out: np.ndarray = None) -> np.ndarray:
+    """
+    Simple moving average, matching pandas rolling(window).mean().
+
+    Args:
+        x: Input values
+        window: Window length
+        dtype: Output dtype, float64 or float32
+        out: Optional preallocated output buffer
+
+    Returns:
+        Array of the same length as x, NaN until the first full window
+    """
+    x = _as_array(x, np.float64)
+    out = _output(x.shape, dtype, out)
+    out[..., :window - 1] = np.nan
+    if x.shape[-1] >= window:
+        out[..., window - 1:] = _window_sums(x, window) / window
+    return out
+
+
+def _rolling_mean_nonnegative(x: np.ndarray, window: int) -> np.ndarray:
+    """
+    Rolling mean of non-negative values that is exactly zero for all-zero
+    windows, as pandas gives, instead of a cumulative-sum rounding residue.
+    """
+    means = rolling_mean(x, window)
+    if x.shape[-1] >= window:
+        nonzero = _window_sums((x > 0).astype(np.float64), window)
+        full = means[..., window - 1:]
+        full[(nonzero < 0.5) & ~np.isnan(full)] = 0.0
+    return means
+
+
+def rolling_std(x, window: int, dtype=np.float64, out: np.ndarray = None) -> np.ndarray:
+    """
+    Sample standard deviation over a window, matching pandas rolling(window).std().
+
+    Squared deviations are taken from each window's own mean, one vectorized
+    pass per lag, so the result has no cancellation error however far the
+    prices drift over the series.
+
+    Args:
+        x: Input values
+        window: Window length
+        dtype: Output dtype, float64 or float32
+        out: Optional preallocated output buffer
+
+    Returns:
+        Array of the same length as x, NaN until the first full window
+    """
+    x = _as_array(x, np.float64)
+    n = x.shape[-1]
+    out = _output(x.shape, dtype, out)
+    out[..., :window - 1] = np.nan
+    if n >= window:
+        count = n - window + 1
+        mean = _window_sums(x, window) / window
+        squares = np.zeros(mean.shape)
+        deviation = np.empty(mean.shape)
+        for lag in range(window):
+            np.subtract(x[..., lag:lag + count], mean, out=deviation)
+            np.multiply(deviation, deviation, out=deviation)
+            squares += deviation
+        np.sqrt(squares / (window - 1), out=out[..., window - 1:], casting="unsafe")
+    return out
+
+
+def _ema_blocks(x: np.ndarray, log_carry: np.ndarray, weight: np.ndarray, previous: np.ndarray,
+                block: int, out: np.ndarray):
+    """
+    Solve y[t] = carry[t] y[t-1] + weight[t] x[t] along the last axis in
+    closed form, one block at a time so the rescaling factors stay finite.
+    """
+    n = x.shape[-1]
+    start = 0
+    while start < n:
+        stop = min(start + block, n)
+        scale = np.exp(-np.cumsum(log_carry[..., start:stop], axis=-1))
+        values = (previous + np.cumsum(weight[..., start:stop] * x[..., start:stop] * scale, axis=-1)) / scale
+        out[..., start:stop] = values
+        previous = values[..., -1:]
+        start = stop
+
+
+def ema(x, span: int, dtype=np.float64, out: np.ndarray = None) -> np.ndarray:
+    """
+    Exponential moving average, matching pandas ewm(span, adjust=False).mean().
+
+    The recurrence y[t] = (1 - a) y[t-1] + a x[t] is solved in closed form
+    over blocks sized so the rescaling factors cannot overflow, which keeps
+    the whole computation vectorized.
+
+    NaN values are handled as pandas does with ignore_na=False: the average
+    is NaN until the first value, holds its last value through NaN, and the
+    next value after a gap of k bars is weighted against the old average
+    decayed over all k bars.
+
+    Args:
+        x: Input values
+        span: EMA span
+        dtype: Output dtype, float64 or float32
+        out: Optional preallocated output buffer
+
+    Returns:
+        Array of the same length as x
+    """
+    x = _as_array(x, np.float64)
+    n = x.shape[-1]
+    out = _output(x.shape, dtype, out)
+    if n == 0:
+        return out
+
+    alpha = 2 / (span + 1)
+    decay = 1 - alpha
+    log_decay = math.log(decay)
+    valid = ~np.isnan(x)
+
+    if valid.all():
+        # Constant coefficients: one shared scale table
+        block = max(1, min(n, int(_EMA_MAX_EXPONENT / -log_decay)))
+        # growth[k] = decay ** -(k + 1)
+        growth = np.exp(-log_decay * np.arange(1, block + 1))
+
+        previous = x[..., :1]
+        out[..., 0] = previous[..., 0]
+        start = 1
+        while start < n:
+            stop = min(start + block, n)
+            scale = growth[:stop - start]
+            values = (previous + alpha * np.cumsum(x[..., start:stop] * scale, axis=-1)) / scale
+            out[..., start:stop] = values
+            previous = values[..., -1:]
+            start = stop
+        return out
+
+    # Bars since the previous value, for every value that has one
+    positions = np.arange(n)
+    last_seen = np.maximum.accumulate(np.where(valid, positions, -1), axis=-1)
+    seen_before = np.full(x.shape, -1)
+    seen_before[..., 1:] = last_seen[..., :-1]
+    gap = positions - seen_before
+
+    # After a gap of k bars the old average keeps decay**k / (decay**k + alpha);
+    # without a gap that is plain decay. The first value seeds the average
+    # (carry decay against a start equal to it) and NaN bars carry it unchanged.
+    # Carries are floored so a long gap cannot overflow one block's scale.
+    log_gap = gap * log_decay
+    log_carry = np.where(seen_before >= 0, log_gap - np.logaddexp(log_gap, math.log(alpha)), log_decay)
+    log_carry = np.where(valid, np.maximum(log_carry, -_EMA_MAX_EXPONENT / 2), 0.0)
+    weight = 1 - np.exp(log_carry)
+
+    first = np.argmax(valid, axis=-1)[..., None]
+    previous = np.nan_to_num(np.take_along_axis(x, first, axis=-1))
+    block = max(1, min(n, int(_EMA_MAX_EXPONENT / 2 / -log_decay)))
+    _ema_blocks(np.where(valid, x, 0.0), log_carry, weight, previous, block, out)
+    out[last_seen < 0] = np.nan
+    return out
+
+
+def macd(x, fast: int = 12, slow: int = 26, signal: int = 9,
+         dtype=np.float64) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    MACD line, signal line and histogram.
+
+    Returns:
+        Tuple of (macd, signal_line, histogram) arrays
+    """
+    x = _as_array(x, np.float64)
+    line = ema(x, fast) - ema(x, slow)
+    signal_line = ema(line, signal)
+    histogram = line - signal_line
+    return line.astype(dtype, copy=False), signal_line.astype(dtype, copy=False), histogram.astype(dtype, copy=False)
+
+
+def rsi(x, window: int = 14, dtype=np.float64, out: np.ndarray = None) -> np.ndarray:
+    """
+    Relative Strength Index from simple rolling means of gains and losses,
+    matching the chart's pandas definition.
+
+    Returns:
+        Array of the same length as x, NaN until the first full window
+    """
+    x = _as_array(x, np.float64)
+    out = _output(x.shape, dtype, out)
+    delta = np.zeros(x.shape)
+    np.subtract(x[..., 1:], x[..., :-1], out=delta[..., 1:])
+    # Changes to or from a missing price count as no change, as in pandas
+    np.nan_to_num(delta, copy=False, nan=0.0)
+    gain = _rolling_mean_nonnegative(np.maximum(delta, 0.0), window)
+    loss = _rolling_mean_nonnegative(np.maximum(-delta, 0.0), window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        np.subtract(100, 100 / (1 + gain / loss), out=out, casting="unsafe")
+    return out
+
+
+def bollinger(x, window: int = 20, width: float = 2, dtype=np.float64) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Bollinger middle, upper and lower bands from one mean and one std pass.
+
+    Returns:
+        Tuple of (middle, upper, lower) arrays
+    """
+    x = _as_array(x, np.float64)
+    middle = rolling_mean(x, window)
+    std = rolling_std(x, window)
+    upper = middle + width * std
+    lower = middle - width * std
+    return middle.astype(dtype, copy=False), upper.astype(dtype, copy=False), lower.astype(dtype, copy=False)
+
+
+def compute_indicator_arrays(close, columns: Iterable[str], dtype=np.float64) -> Dict[str, np.ndarray]:
+    """
+    Compute chart indicator columns into one preallocated block.
+
+    Every returned array is a view into a single (columns x ...) array, so
+    building a DataFrame from them does not copy per column.
+
+    Args:
+        close: Close prices, 1-D or with time along the last axis
+        columns: Indicator column names as produced by the chart
+        dtype: Output dtype, float64 or float32
+
+    Returns:
+        Dictionary mapping each column name to its array view
+    """
+    columns = list(columns)
+    unknown = set(columns) - set(KERNEL_COLUMNS)
+    if unknown:
+        raise ValueError(f"No kernel for indicators: {', '.join(sorted(unknown))}")
+    x = _as_array(close, np.float64)
+    block = np.empty((len(columns),) + x.shape, dtype=dtype)
+    rows = {name: block[i] for i, name in enumerate(columns)}
+    wanted = set(columns)
+
+    def store(name, values):
+        if name in wanted:
+            rows[name][:] = values
+
+    for window in (20, 50, 200):
+        if f'SMA_{window}' in wanted:
+            rolling_mean(x, window, dtype=dtype, out=rows[f'SMA_{window}'])
+    for span in (12, 26):
+        if f'EMA_{span}' in wanted:
+            ema(x, span, dtype=dtype, out=rows[f'EMA_{span}'])
+    if wanted & {'MACD', 'Signal_Line', 'MACD_Histogram'}:
+        line, signal_line, histogram = macd(x)
+        store('MACD', line)
+        store('Signal_Line', signal_line)
+        store('MACD_Histogram', histogram)
+    if 'RSI' in wanted:
+        rsi(x, dtype=dtype, out=rows['RSI'])
+    if wanted & {'BB_Middle', 'BB_Upper', 'BB_Lower'}:
+        middle, upper, lower = bollinger(x)
+        store('BB_Middle', middle)
+        store('BB_Upper', upper)
+        store('BB_Lower', lower)
+
+    return rows
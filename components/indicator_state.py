@@ -0,0 +1,306 @@
+import math
+from collections import deque
+from typing import Dict, Iterable, Optional, Tuple
+
+import pandas as pd
+
+# Bump when the checkpoint layout changes so old checkpoints are rebuilt
+STATE_VERSION = 2
+
+
+class RollingWindow:
+    """
+    Fixed-size window with running sums for O(1) mean and sample std.
+
+    Sums are kept relative to a shift value and rebuilt from the buffer
+    once per window length, which bounds floating point drift. NaN values
+    are counted rather than summed, so the window is NaN while one is
+    inside it, as in pandas, and recovers once it has left.
+    """
+
+    def __init__(self, size: int, values: Iterable[float] = ()):
+        self.size = size
+        self.values = deque(values, maxlen=size)
+        self._rebuild()
+
+    def _rebuild(self):
+        present = [value for value in self.values if not math.isnan(value)]
+        self._shift = present[0] if present else 0.0
+        self._sum = sum(value - self._shift for value in present)
+        self._sum_sq = sum((value - self._shift) ** 2 for value in present)
+        self._missing = len(self.values) - len(present)
+        self._updates = 0
+
+    def _add(self, value: float, sign: int):
+        if math.isnan(value):
+            self._missing += sign
+            return
+        shifted = value - self._shift
+        self._sum += sign * shifted
+        self._sum_sq += sign * shifted * shifted
+
+    def push(self, value: float):
+        """Append a value, dropping the oldest one once the window is full"""
+        if len(self.values) == self.size:
+            self._add(self.values[0], -1)
+        self.values.append(value)
+        self._add(value, 1)
+        self._updates += 1
+        if self._updates >= self.size:
+            self._rebuild()
+
+    def replace_last(self, value: float):
+        """Replace the most recent value, e.g. when the current bar is revised"""
+        self._add(self.values[-1], -1)
+        self.values[-1] = value
+        self._add(value, 1)
+
+    def mean(self) -> float:
+        """Mean of the window, NaN until it is full or while it holds NaN"""
+        if len(self.values) < self.size or self._missing:
+            return math.nan
+        return self._shift + self._sum / self.size
+
+    def std(self) -> float:
+        """Sample standard deviation of the window, NaN until it is full or while it holds NaN"""
+        n = len(self.values)
+        if n < self.size or n < 2 or self._missing:
+            return math.nan
+        variance = (self._sum_sq - self._sum * self._sum / n) / (n - 1)
+        return math.sqrt(max(variance, 0.0))
+
+
+class EMAState:
+    """
+    Exponential moving average matching pandas ewm(span, adjust=False).
+
+    NaN observations are handled as pandas does with ignore_na=False: the
+    average holds its value through them while the weight of the old
+    average keeps decaying, so the next observation counts for more.
+    """
+
+    def __init__(self, span: int, value: Optional[float] = None, weight: float = 1.0,
+                 previous: Optional[float] = None, previous_weight: float = 1.0):
+        self.span = span
+        self.alpha = 2 / (span + 1)
+        self.value = value
+        self.weight = weight  # Weight of value against the next observation, before decay
+        self.previous = previous
+        self.previous_weight = previous_weight
+
+    def _next(self, base: Optional[float], weight: float, x: float) -> Tuple[Optional[float], float]:
+        if base is None:
+            return (None, 1.0) if math.isnan(x) else (x, 1.0)
+        weight *= 1 - self.alpha
+        if math.isnan(x):
+            return base, weight
+        return (weight * base + self.alpha * x) / (weight + self.alpha), 1.0
+
+    def push(self, x: float) -> Optional[float]:
+        """Advance the average by one observation"""
+        self.previous, self.previous_weight = self.value, self.weight
+        self.value, self.weight = self._next(self.previous, self.previous_weight, x)
+        return self.value
+
+    def replace_last(self, x: float) -> Optional[float]:
+        """Recompute the latest step with a revised observation"""
+        self.value, self.weight = self._next(self.previous, self.previous_weight, x)
+        return self.value
+
+    def current(self) -> float:
+        """Latest average, NaN before the first observation"""
+        return math.nan if self.value is None else self.value
+
+
+class IndicatorState:
+    """
+    Incremental state for the chart's technical indicators.
+
+    Each new bar updates every indicator in O(1), producing the same values
+    as a full recompute with calculate_technical_indicators. Re-sending the
+    latest timestamp revises the current bar instead of appending, which is
+    what intraday refreshes do. The state can be saved with to_dict and
+    restored with from_dict alongside the stored price history.
+    """
+
+    def __init__(self):
+        self.windows = {20: RollingWindow(20), 50: RollingWindow(50), 200: RollingWindow(200)}
+        self.emas = {12: EMAState(12), 26: EMAState(26)}
+        self.signal = EMAState(9)
+        self.gains = RollingWindow(14)
+        self.losses = RollingWindow(14)
+        self.last_close: Optional[float] = None
+        self.previous_close: Optional[float] = None
+        self.last_timestamp: Optional[pd.Timestamp] = None
+
+    @classmethod
+    def from_history(cls, close: pd.Series) -> "IndicatorState":
+        """
+        Build the state by replaying a close price series.
+
+        Args:
+            close: Close prices indexed by timestamp
+
+        Returns:
+            State positioned after the last bar of the series
+        """
+        state = cls()
+        for timestamp, value in close.items():
+            state.update(value, timestamp)
+        return state
+
+    def update(self, close: float, timestamp: pd.Timestamp = None) -> Dict[str, float]:
+        """
+        Add a bar, or revise the latest one if the timestamp is unchanged.
+
+        Args:
+            close: Close price of the bar
+            timestamp: Bar timestamp
+
+        Returns:
+            Dictionary of the latest indicator values, keyed by column name
+        """
+        close = float(close)
+        if timestamp is not None and timestamp == self.last_timestamp:
+            self._revise(close)
+        else:
+            self._append(close)
+            self.last_timestamp = timestamp
+        return self.values()
+
+    def _append(self, close: float):
+        delta = self._change(close, self.last_close)
+        self.previous_close = self.last_close
+        self.last_close = close
+
+        for window in self.windows.values():
+            window.push(close)
+        for ema in self.emas.values():
+            ema.push(close)
+        self.signal.push(self.emas[12].current() - self.emas[26].current())
+        self.gains.push(max(delta, 0.0))
+        self.losses.push(max(-delta, 0.0))
+
+    def _revise(self, close: float):
+        delta = self._change(close, self.previous_close)
+        self.last_close = close
+
+        for window in self.windows.values():
+            window.replace_last(close)
+        for ema in self.emas.values():
+            ema.replace_last(close)
+        self.signal.replace_last(self.emas[12].current() - self.emas[26].current())
+        self.gains.replace_last(max(delta, 0.0))
+        self.losses.replace_last(max(-delta, 0.0))
+
+    @staticmethod
+    def _change(close: float, previous: Optional[float]) -> float:
+        """
+        Price change for the RSI. The first change, and any change to or from
+        a missing price, counts as zero, as in the pandas RSI.
+        """
+        if previous is None:
+            return 0.0
+        delta = close - previous
+        return 0.0 if math.isnan(delta) else delta
+
+    def values(self) -> Dict[str, float]:
+        """Return the latest value of every indicator, keyed by column name"""
+        sma_20 = self.windows[20].mean()
+        std_20 = self.windows[20].std()
+        macd = self.emas[12].current() - self.emas[26].current()
+        gain = self.gains.mean()
+        loss = self.losses.mean()
+        if loss != 0:
+            rsi = 100 - (100 / (1 + gain / loss))
+        else:
+            rsi = 100.0 if gain > 0 else math.nan
+
+        return {
+            'SMA_20': sma_20,
+            'SMA_50': self.windows[50].mean(),
+            'SMA_200': self.windows[200].mean(),
+            'EMA_12': self.emas[12].current(),
+            'EMA_26': self.emas[26].current(),
+            'MACD': macd,
+            'Signal_Line': self.signal.current(),
+            'MACD_Histogram': macd - self.signal.current(),
+            'RSI': rsi,
+            'BB_Middle': sma_20,
+            'BB_Upper': sma_20 + 2 * std_20,
+            'BB_Lower': sma_20 - 2 * std_20,
+        }
+
+    def to_dict(self) -> dict:
+        """Serialize the state to a JSON-compatible checkpoint"""
+        return {
+            'version': STATE_VERSION,
+            'windows': {str(size): list(window.values) for size, window in self.windows.items()},
+            'emas': {str(span): self._ema_checkpoint(ema) for span, ema in self.emas.items()},
+            'signal': self._ema_checkpoint(self.signal),
+            'gains': list(self.gains.values),
+            'losses': list(self.losses.values),
+            'last_close': self.last_close,
+            'previous_close': self.previous_close,
+            'last_timestamp': None if self.last_timestamp is None else self.last_timestamp.isoformat(),
+        }
+
+    @staticmethod
+    def _ema_checkpoint(ema: EMAState) -> list:
+        return [ema.value, ema.weight, ema.previous, ema.previous_weight]
+
+    @classmethod
+    def from_dict(cls, checkpoint: dict) -> Optional["IndicatorState"]:
+        """
+        Restore a state saved with to_dict.
+
+        Returns:
+            The restored state, or None if the checkpoint is from another version
+        """
+        if checkpoint.get('version') != STATE_VERSION:
+            return None
+        state = cls()
+        state.windows = {int(size): RollingWindow(int(size), values)
+                         for size, values in checkpoint['windows'].items()}
+        state.emas = {int(span): EMAState(int(span), *values) for span, values in checkpoint['emas'].items()}
+        state.signal = EMAState(9, *checkpoint['signal'])
+        state.gains = RollingWindow(14, checkpoint['gains'])
+        state.losses = RollingWindow(14, checkpoint['losses'])
+        state.last_close = checkpoint['last_close']
+        state.previous_close = checkpoint['previous_close']
+        if checkpoint['last_timestamp'] is not None:
+            state.last_timestamp = pd.Timestamp(checkpoint['last_timestamp'])
+        return state
+
+
+def _same_price(a: float, b: float) -> bool:
+    """Compare two prices, treating two missing prices as the same"""
+    return math.isclose(a, b) or (math.isnan(a) and math.isnan(b))
+
+
+def sync_indicator_state(state: Optional[IndicatorState], close: pd.Series) -> IndicatorState:
+    """
+    Bring a saved state up to date with a close price series.
+
+    Only the bars from the state's last timestamp onwards are replayed (the
+    last one as a revision). The state is rebuilt from scratch if it does
+    not line up with the series, e.g. after a split rewrote the history.
+
+    Args:
+        state: Previously saved state, or None
+        close: Full close price series indexed by timestamp
+
+    Returns:
+        State positioned after the last bar of the series
+    """
+    if state is None or state.last_timestamp is None or state.last_timestamp not in close.index:
+        return IndicatorState.from_history(close)
+    position = close.index.get_loc(state.last_timestamp)
+    # The last bar may legitimately have been revised, but the one before it
+    # must match or the history was rewritten underneath the state
+    if position > 0 and state.previous_close is not None \
+            and not _same_price(close.iloc[position - 1], state.previous_close):
+        return IndicatorState.from_history(close)
+    for timestamp, value in close.iloc[position:].items():
+        state.update(value, timestamp)
+    return state
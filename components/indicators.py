@@ -0,0 +1,201 @@
+import pandas as pd
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Price columns indicators can be built from, keyed by their node name
+SOURCES = {
+    'open': 'Open',
+    'high': 'High',
+    'low': 'Low',
+    'close': 'Close',
+    'volume': 'Volume',
+}
+
+
+class Indicator:
+    """
+    A node in the indicator graph.
+
+    Each node is a function of other nodes (or price sources) and fixed
+    parameters, e.g. SMA_20 = rolling_mean(close, window=20).
+    """
+
+    def __init__(self, name: str, func: Callable, inputs: Tuple[str, ...], params: dict):
+        self.name = name
+        self.func = func
+        self.inputs = inputs
+        self.params = params
+
+
+INDICATORS: Dict[str, Indicator] = {}
+
+# Indicator groups that can be selected, and the columns each one adds
+INDICATOR_GROUPS = {
+    'sma': ['SMA_20', 'SMA_50', 'SMA_200'],
+    'ema': ['EMA_12', 'EMA_26'],
+    'macd': ['MACD', 'Signal_Line', 'MACD_Histogram'],
+    'rsi': ['RSI'],
+    'bollinger': ['BB_Middle', 'BB_Upper', 'BB_Lower'],
+}
+
+
+def register_indicator(name: str, func: Callable, inputs: Iterable[str] = ('close',), **params):
+    """
+    Add a node to the indicator graph.
+
+    Args:
+        name: Name the result is exposed under
+        func: Function called with the input series followed by params
+        inputs: Names of the nodes or price sources the function takes
+        **params: Fixed keyword arguments for the function
+    """
+    inputs = tuple(inputs)
+    for dependency in inputs:
+        if dependency not in INDICATORS and dependency not in SOURCES:
+            raise ValueError(f"Indicator {name} depends on unknown node {dependency}")
+    INDICATORS[name] = Indicator(name, func, inputs, params)
+
+
+def _signature(name: str, signatures: Dict[str, tuple]) -> tuple:
+    """
+    Return a structural key for a node: the same function over the same
+    inputs with the same parameters gives the same key whatever it is called.
+    """
+    if name in signatures:
+        return signatures[name]
+    if name in SOURCES:
+        signature = ('source', name)
+    else:
+        node = INDICATORS[name]
+        signature = (
+            node.func,
+            tuple(_signature(dependency, signatures) for dependency in node.inputs),
+            tuple(sorted(node.params.items())),
+        )
+    signatures[name] = signature
+    return signature
+
+
+def evaluate_indicators(data: pd.DataFrame, names: Iterable[str]) -> Dict[str, pd.Series]:
+    """
+    Evaluate indicator nodes and their dependencies, each shared piece once.
+
+    Nodes are de-duplicated by structure, so two indicators that need the
+    same rolling window or EMA share a single computation.
+
+    Args:
+        data: DataFrame with the price columns the nodes need
+        names: Names of the indicator nodes to return
+
+    Returns:
+        Dictionary mapping each requested name to its series
+    """
+    signatures: Dict[str, tuple] = {}
+    results: Dict[tuple, pd.Series] = {}
+
+    def resolve(name: str) -> pd.Series:
+        signature = _signature(name, signatures)
+        if signature not in results:
+            if name in SOURCES:
+                results[signature] = data[SOURCES[name]]
+            else:
+                node = INDICATORS[name]
+                args = [resolve(dependency) for dependency in node.inputs]
+                results[signature] = node.func(*args, **node.params)
+        return results[signature]
+
+    values = {}
+    for name in names:
+        if name not in INDICATORS:
+            raise ValueError(f"Unknown indicator: {name}")
+        values[name] = resolve(name)
+    return values
+
+
+def group_columns(groups: Iterable[str]) -> List[str]:
+    """
+    Expand indicator groups into their columns, in the standard order.
+
+    Args:
+        groups: Keys of INDICATOR_GROUPS
+
+    Returns:
+        Column names of the selected groups
+    """
+    groups = set(groups)
+    unknown = groups - INDICATOR_GROUPS.keys()
+    if unknown:
+        raise ValueError(f"Unknown indicators: {', '.join(sorted(unknown))}")
+    return [column for group, columns in INDICATOR_GROUPS.items() if group in groups for column in columns]
+
+
+# Building blocks
+
+def rolling_mean(series: pd.Series, window: int) -> pd.Series:
+    """Simple moving average over a window"""
+    return series.rolling(window=window).mean()
+
+
+def rolling_std(series: pd.Series, window: int) -> pd.Series:
+    """Sample standard deviation over a window"""
+    return series.rolling(window=window).std()
+
+
+def ewm_mean(series: pd.Series, span: int) -> pd.Series:
+    """Exponential moving average with the given span"""
+    return series.ewm(span=span, adjust=False).mean()
+
+
+def difference(left: pd.Series, right: pd.Series) -> pd.Series:
+    """Difference of two series"""
+    return left - right
+
+
+def price_change(series: pd.Series) -> pd.Series:
+    """Change from the previous bar"""
+    return series.diff()
+
+
+def average_gain(delta: pd.Series, window: int) -> pd.Series:
+    """Mean of the positive changes over a window"""
+    return (delta.where(delta > 0, 0)).rolling(window=window).mean()
+
+
+def average_loss(delta: pd.Series, window: int) -> pd.Series:
+    """Mean of the magnitudes of negative changes over a window"""
+    return (-delta.where(delta < 0, 0)).rolling(window=window).mean()
+
+
+def relative_strength_index(gain: pd.Series, loss: pd.Series) -> pd.Series:
+    """RSI from average gains and losses"""
+    rs = gain / loss
+    return 100 - (100 / (1 + rs))
+
+
+def band(middle: pd.Series, std: pd.Series, width: float) -> pd.Series:
+    """Band a number of standard deviations from the middle line"""
+    return middle + width * std
+
+
+# Simple Moving Averages
+register_indicator('SMA_20', rolling_mean, window=20)
+register_indicator('SMA_50', rolling_mean, window=50)
+register_indicator('SMA_200', rolling_mean, window=200)
+
+# Exponential Moving Averages and MACD
+register_indicator('EMA_12', ewm_mean, span=12)
+register_indicator('EMA_26', ewm_mean, span=26)
+register_indicator('MACD', difference, inputs=('EMA_12', 'EMA_26'))
+register_indicator('Signal_Line', ewm_mean, inputs=('MACD',), span=9)
+register_indicator('MACD_Histogram', difference, inputs=('MACD', 'Signal_Line'))
+
+# RSI
+register_indicator('Price_Change', price_change)
+register_indicator('Average_Gain', average_gain, inputs=('Price_Change',), window=14)
+register_indicator('Average_Loss', average_loss, inputs=('Price_Change',), window=14)
+register_indicator('RSI', relative_strength_index, inputs=('Average_Gain', 'Average_Loss'))
+
+# Bollinger Bands; the middle band is the same node as SMA_20
+register_indicator('BB_Middle', rolling_mean, window=20)
+register_indicator('BB_Std', rolling_std, window=20)
+register_indicator('BB_Upper', band, inputs=('BB_Middle', 'BB_Std'), width=2)
+register_indicator('BB_Lower', band, inputs=('BB_Middle', 'BB_Std'), width=-2)
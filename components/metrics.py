@@ -1,109 +1,74 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
+from typing import Tuple
+from utils import get_ticker_info, submit_fetch, fetch_concurrently
+from services.fundamentals import (STATEMENT_GETTERS, get_statements, key_ratios, summarize_statements,
+                                   align_statements, peer_ratios)
+
+# Upper bound on the number of companies in one peer comparison
+MAX_PEERS = 20
 
-@st.cache_data(ttl=3600)
 def display_metrics(symbol: str) -> pd.DataFrame:
     """
     Display key financial metrics for the stock.
-    
+
     Args:
         symbol: Stock symbol
-    
+
     Returns:
         DataFrame containing financial metrics
     """
-    stock = yf.Ticker(symbol)
-    info = stock.info
-    
-    metrics = {
-        'Metric': [
-            'P/E Ratio',
-            'Forward P/E',
-            'PEG Ratio',
-            'Price to Book',
-            'Price to Sales',
-            'Dividend Yield (%)',
-            'Beta',
-            '52 Week High',
-            '52 Week Low'
-        ],
-        'Value': [
-            info.get('trailingPE', 'N/A'),
-            info.get('forwardPE', 'N/A'),
-            info.get('pegRatio', 'N/A'),
-            info.get('priceToBook', 'N/A'),
-            info.get('priceToSalesTrailing12Months', 'N/A'),
-            info.get('dividendYield', 'N/A'),
-            info.get('beta', 'N/A'),
-            info.get('fiftyTwoWeekHigh', 'N/A'),
-            info.get('fiftyTwoWeekLow', 'N/A')
-        ]
-    }
-    
-    df = pd.DataFrame(metrics)
+    df = key_ratios(get_ticker_info(symbol))
     st.dataframe(df, use_container_width=True)
     return df
 
-@st.cache_data(ttl=3600)
 def create_financials_table(symbol: str) -> pd.DataFrame:
     """
     Create a table of financial statements data.
-    
+
+    Only builds the table; rendering is left to the caller.
+
     Args:
         symbol: Stock symbol
-    
+
     Returns:
-        DataFrame containing financial statements
+        DataFrame containing financial statements, empty if none are available
     """
-    stock = yf.Ticker(symbol)
-    
-    # Get financial statements
-    income_stmt = stock.financials
-    balance_sheet = stock.balance_sheet
-    cash_flow = stock.cashflow
-    
-    # Initialize empty lists for metrics
-    metrics_data = []
-    metrics_index = []
-    
-    # Helper function to safely get financial data
-    def safe_get_metric(statement, metric_name):
-        try:
-            if metric_name in statement.index:
-                return statement.loc[metric_name]
-            return pd.Series([None] * len(statement.columns), index=statement.columns)
-        except:
-            return pd.Series([None] * len(statement.columns), index=statement.columns)
-    
-    # Safely get each metric
-    metrics = [
-        ('Revenue', income_stmt, 'Total Revenue'),
-        ('Net Income', income_stmt, 'Net Income'),
-        ('Total Assets', balance_sheet, 'Total Assets'),
-        ('Total Liabilities', balance_sheet, 'Total Liabilities Net Minority Interest'),
-        ('Operating Cash Flow', cash_flow, 'Operating Cash Flow'),
-        ('Free Cash Flow', cash_flow, 'Free Cash Flow')
-    ]
-    
-    for display_name, statement, metric_name in metrics:
-        metric_data = safe_get_metric(statement, metric_name)
-        if not metric_data.empty and not all(pd.isna(metric_data)):
-            metrics_data.append(metric_data)
-            metrics_index.append(display_name)
-    
-    # Create DataFrame only if we have data
-    if metrics_data and metrics_index:
-        df = pd.DataFrame(metrics_data, index=metrics_index)
-        
-        # Format the DataFrame
+    return summarize_statements(get_statements(symbol))
+
+def create_peer_comparison_table(symbols: Tuple[str, ...]) -> pd.DataFrame:
+    """
+    Create a side-by-side table of derived ratios for several companies.
+
+    Every statement and info snapshot is fetched concurrently on the shared
+    pool, and the ratios are computed for all companies at once.
+
+    Args:
+        symbols: Stock symbols to compare
+
+    Returns:
+        DataFrame indexed by symbol with a Name column, the ratios from
+        peer_ratios and an Error column for companies that failed to load
+    """
+    symbols = list(dict.fromkeys(symbols))[:MAX_PEERS]
+    futures = {(symbol, name): submit_fetch(getter, symbol)
+               for symbol in symbols for name, getter in STATEMENT_GETTERS.items()}
+    infos = fetch_concurrently(get_ticker_info, symbols)
+
+    statements, errors = {symbol: {} for symbol in symbols}, {}
+    for (symbol, name), future in futures.items():
         try:
-            st.dataframe(df.style.format("${:,.0f}"), use_container_width=True)
+            statements[symbol][name] = future.result()
         except Exception as e:
-            st.warning(f"Some financial data might not be in the expected format: {str(e)}")
-            st.dataframe(df, use_container_width=True)
-        
-        return df
-    else:
-        st.info("No financial statements data available for this stock.")
-        return pd.DataFrame()
+            errors[symbol] = str(e)
+    for symbol, info in infos.items():
+        if isinstance(info, Exception):
+            errors.setdefault(symbol, str(info))
+            infos[symbol] = {}
+
+    table = peer_ratios(align_statements(statements),
+                        pd.Series({symbol: info.get('marketCap') for symbol, info in infos.items()}, dtype=object))
+    table.insert(0, 'Name', [infos[symbol].get('longName', symbol) for symbol in table.index])
+    table['Error'] = pd.Series(errors, dtype=object)
+    table.index.name = 'Symbol'
+    return table
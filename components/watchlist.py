@@ -1,12 +1,15 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 from openai import OpenAI
 import os
 from typing import List, Dict
+from utils import get_ticker_info, get_quotes
+from services.cache import single_flight
+from components.health_score import score_symbols
 
 client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
 
+@single_flight
 def get_ai_recommendation(symbol: str) -> str:
     """
     Get AI-powered recommendation for a stock using OpenAI.
@@ -18,8 +21,7 @@ def get_ai_recommendation(symbol: str) -> str:
         AI-generated recommendation
     """
     try:
-        stock = yf.Ticker(symbol)
-        info = stock.info
+        info = get_ticker_info(symbol)
         
         # Prepare context for AI
         context = (
@@ -96,20 +98,29 @@ def display_watchlist():
     
     # Display watchlist
     if st.session_state.watchlist:
-        for symbol in st.session_state.watchlist:
+        # One batched fetch for the whole watchlist instead of a request per symbol
+        quotes = get_quotes(tuple(st.session_state.watchlist))
+        health = score_symbols(tuple(st.session_state.watchlist))
+        for symbol, quote in quotes.iterrows():
             try:
-                stock = yf.Ticker(symbol)
-                info = stock.info
+                if pd.notna(quote['error']):
+                    raise RuntimeError(quote['error'])
                 
-                with st.expander(f"{info.get('longName', symbol)} ({symbol})"):
-                    col1, col2 = st.columns([3, 1])
+                with st.expander(f"{quote['name']} ({symbol})"):
+                    col1, col2, col3 = st.columns([2, 2, 1])
                     with col1:
                         st.metric(
                             "Current Price",
-                            f"${info.get('currentPrice', 'N/A')}",
-                            f"{info.get('regularMarketChangePercent', 0):.2f}%"
+                            f"${quote['price']:.2f}" if pd.notna(quote['price']) else "$N/A",
+                            f"{quote['change_pct'] if pd.notna(quote['change_pct']) else 0:.2f}%"
                         )
                     with col2:
+                        st.metric(
+                            "Health Score",
+                            f"{health.loc[symbol, 'score']}/100" if symbol in health.index else "N/A",
+                            help="Rule-based financial health score"
+                        )
+                    with col3:
                         if st.button("Remove", key=f"remove_{symbol}"):
                             remove_from_watchlist(symbol)
                             st.rerun()
@@ -1,15 +1,17 @@
 import streamlit as st
-import yfinance as yf
 from datetime import datetime, timedelta
-from components.chart import create_stock_chart, create_dividend_chart
-from components.metrics import display_metrics, create_financials_table
+from components.chart import get_stock_chart, data_version, create_dividend_chart, compute_indicators
+from components.indicators import INDICATOR_GROUPS
+from components.downsample import point_budget
+from components.metrics import display_metrics, create_financials_table, create_peer_comparison_table
 from components.watchlist import display_watchlist, get_ai_recommendation
 from components.social import display_share_buttons
-from components.health_score import calculate_health_score, display_health_score
+from components.health_score import calculate_health_score, display_health_score, start_ai_analysis, display_ai_analysis
 from components.tutorial import check_and_display_tutorial
 from components.auth import init_session_state, display_login_form
 from components.theme import display_theme_toggle
-from utils import get_stock_data, get_dividend_data, download_csv
+from utils import prefetch_symbol_data, download_data
+from services.market_data import is_upstream_healthy
 
 
 # Set page config
@@ -68,12 +70,16 @@ with st.sidebar:
     display_theme_toggle()
 
 try:
-    # Fetch stock data
-    stock_data = get_stock_data(symbol, period)
+    # Start every fetch for this symbol at once; each section waits on its own
+    prefetched = prefetch_symbol_data(symbol, period)
+    stock_data = prefetched["history"].result()
+    
+    if not is_upstream_healthy():
+        st.warning("Market data is temporarily unavailable. Showing the most recent cached data.")
     
     if stock_data is not None:
         # Display current price and basic info
-        info = yf.Ticker(symbol).info
+        info = prefetched["info"].result()
         company_name = info.get('longName', symbol)
         
         # Header metrics with responsive layout
@@ -138,18 +144,33 @@ try:
             'macd': show_macd
         }
         
-        fig = create_stock_chart(stock_data, company_name, show_indicators)
+        # Long histories are drawn at reduced resolution; narrowing the date
+        # range redraws the selected bars in full detail
+        date_range = None
+        max_candles, _ = point_budget()
+        if len(stock_data) > max_candles:
+            first_date, last_date = stock_data.index[0].date(), stock_data.index[-1].date()
+            date_range = st.slider("Zoom", min_value=first_date, max_value=last_date,
+                                   value=(first_date, last_date),
+                                   help="Narrow the date range to see every bar")
+        
+        fig = get_stock_chart(symbol, period, data_version(stock_data), show_indicators,
+                              st.session_state.get('theme', 'light'), date_range, company_name, stock_data)
         st.plotly_chart(fig, use_container_width=True)
         
         # Get and display dividend history
-        dividend_data = get_dividend_data(symbol)
-        if dividend_data is not None:
-            dividend_fig = create_dividend_chart(dividend_data, company_name)
-            if dividend_fig:
-                st.subheader("Dividend History")
-                st.plotly_chart(dividend_fig, use_container_width=True)
+        try:
+            dividend_data = prefetched["dividends"].result()
+        except Exception as e:
+            st.error(f"Error fetching dividend data: {str(e)}")
         else:
-            st.info("No dividend history available for this stock.")
+            if dividend_data is not None:
+                dividend_fig = create_dividend_chart(dividend_data, company_name)
+                if dividend_fig:
+                    st.subheader("Dividend History")
+                    st.plotly_chart(dividend_fig, use_container_width=True)
+            else:
+                st.info("No dividend history available for this stock.")
 
         # Financial metrics
         st.subheader("Financial Metrics")
@@ -157,25 +178,57 @@ try:
         
         # Financial statements
         st.subheader("Financial Statements")
+        # Wait for the prefetched statements so the table is built from cache
+        prefetched["statements"].result()
         financials_df = create_financials_table(symbol)
         
         if not financials_df.empty:
             st.dataframe(financials_df.style.format("${:,.0f}"), use_container_width=True)
             
-            # Download buttons
-            col1, col2 = st.columns(2)
+            # Downloads; files are only built when requested
+            col1, col2, col3 = st.columns(3)
             with col1:
-                download_csv(stock_data, f"{symbol}_price_data")
+                download_data(lambda: {"price_data": stock_data}, f"{symbol}_{period}_price_data",
+                              key="price_data", label="Download price data")
             with col2:
-                download_csv(financials_df, f"{symbol}_financials")
+                download_data(lambda: {"financials": financials_df}, f"{symbol}_financials",
+                              key="financials", label="Download financials")
+            with col3:
+                download_data(lambda: {
+                    "price_data": stock_data,
+                    "indicators": compute_indicators(stock_data, INDICATOR_GROUPS),
+                    "financials": financials_df,
+                }, f"{symbol}_{period}_bundle", key="bundle", label="Download all")
         else:
             st.info("Financial statements are not available for this stock.")
+        
+        # Peer comparison
+        with st.expander("Compare with Peers"):
+            peers = st.text_input("Peer symbols, comma-separated (e.g., MSFT, GOOGL, META)",
+                                  help="Compare up to 20 companies on their latest annual statements")
+            peer_symbols = [peer.strip().upper() for peer in peers.split(",") if peer.strip()]
+            if peer_symbols:
+                peer_df = create_peer_comparison_table(tuple([symbol] + peer_symbols))
+                percent_columns = ['Gross Margin', 'Operating Margin', 'Net Margin', 'Revenue Growth',
+                                   'Net Income Growth', 'Debt / Assets', 'FCF Yield']
+                st.dataframe(
+                    peer_df.style.format("{:.1%}", subset=percent_columns, na_rep="N/A")
+                                 .format("${:,.0f}", subset=['Revenue', 'Market Cap'], na_rep="N/A")
+                                 .format("{:%Y-%m-%d}", subset=['Fiscal Year End'], na_rep="N/A"),
+                    use_container_width=True
+                )
             
-        # Financial Health Score
+        # Financial Health Score; the rule-based score renders at once and
+        # the AI narrative fills in below it when the model answers
         st.markdown("---")
-        st.subheader("AI-Powered Financial Health Assessment")
+        st.subheader("Financial Health Assessment")
         health_score_data = calculate_health_score(symbol)
         display_health_score(health_score_data)
+        ai_analysis = None
+        if st.toggle("AI analysis", value=True, help="Add an AI-written narrative to the health score"):
+            ai_analysis = start_ai_analysis(symbol)
+            ai_placeholder = st.empty()
+            ai_placeholder.info("The AI analysis is being written and will appear here.")
         
         # Social sharing section
         st.markdown("---")
@@ -185,6 +238,10 @@ try:
         # Display watchlist with AI recommendations
         st.markdown("---")
         display_watchlist()
+        
+        if ai_analysis is not None:
+            with ai_placeholder.container():
+                display_ai_analysis(ai_analysis)
     else:
         st.error("Unable to fetch data for the specified symbol.")
 
@@ -0,0 +1,329 @@
+import os
+import time
+import pickle
+import sqlite3
+import threading
+import functools
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+# (ttl, max_stale) in seconds per data type. Within ttl a value is served as
+# is; for max_stale seconds after that it is still served immediately while
+# a background worker refreshes it; past that the caller waits for a fetch.
+CACHE_POLICIES: Dict[str, Tuple[int, int]] = {
+    "info": (900, 3600),
+    "quotes": (300, 900),
+    "history": (3600, 86400),
+    "dividends": (3600, 7 * 86400),
+    # Annual statements change once a quarter at most; a week-old copy is
+    # current, and a stale one is still served while it refreshes
+    "income_statement": (7 * 86400, 90 * 86400),
+    "balance_sheet": (7 * 86400, 90 * 86400),
+    "cash_flow": (7 * 86400, 90 * 86400),
+}
+
+# Shared tier behind the in-process cache: "memory" (none) or "sqlite"
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "memory")
+
+# SQLite file used when CACHE_BACKEND is "sqlite"; point every worker at it
+CACHE_PATH = os.environ.get("CACHE_PATH", os.path.join(".cache", "cache.sqlite3"))
+
+_refresh_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+
+
+def get_policy(data_type: str) -> Tuple[int, int]:
+    """
+    Return the (ttl, max_stale) policy for a data type.
+
+    Either value can be overridden with the CACHE_TTL_<TYPE> and
+    CACHE_MAX_STALE_<TYPE> environment variables.
+    """
+    ttl, max_stale = CACHE_POLICIES[data_type]
+    suffix = data_type.upper()
+    ttl = int(os.environ.get(f"CACHE_TTL_{suffix}", ttl))
+    max_stale = int(os.environ.get(f"CACHE_MAX_STALE_{suffix}", max_stale))
+    return ttl, max_stale
+
+
+class SQLiteBackend:
+    """
+    Cache tier stored in a SQLite file shared by every app process.
+
+    Values are pickled with the highest protocol, which writes DataFrame
+    column blocks as raw buffers, so storing and loading price history is
+    close to a memory copy.
+    """
+
+    def __init__(self, path: str = CACHE_PATH):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                value BLOB NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace: str, key: str) -> Optional[Tuple[object, float]]:
+        """Return (value, fetched_at) for a key, or None if it is not stored"""
+        row = self._connection().execute(
+            "SELECT value, fetched_at FROM cache WHERE namespace = ? AND key = ?",
+            (namespace, key)
+        ).fetchone()
+        if row is None:
+            return None
+        return pickle.loads(row[0]), row[1]
+
+    def set(self, namespace: str, key: str, value, fetched_at: float):
+        """Store a value for a key, replacing any previous one"""
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (namespace, key, fetched_at, value) VALUES (?, ?, ?, ?)",
+            (namespace, key, fetched_at, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        )
+        conn.commit()
+
+    def clear(self, namespace: str):
+        """Drop every stored value in a namespace"""
+        conn = self._connection()
+        conn.execute("DELETE FROM cache WHERE namespace = ?", (namespace,))
+        conn.commit()
+
+
+_backend: Optional[SQLiteBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> Optional[SQLiteBackend]:
+    """Return the shared cache tier configured by CACHE_BACKEND, if any"""
+    global _backend
+    if CACHE_BACKEND == "memory":
+        return None
+    if CACHE_BACKEND != "sqlite":
+        raise ValueError(f"Unknown cache backend: {CACHE_BACKEND}")
+    with _backend_lock:
+        if _backend is None:
+            _backend = SQLiteBackend()
+    return _backend
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait for and share its result (or its exception).
+    """
+
+    def __init__(self):
+        self._calls: Dict[object, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func: Callable, *args, **kwargs):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = func(*args, **kwargs)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+
+def single_flight(func: Callable) -> Callable:
+    """
+    Decorator sharing one in-flight call between concurrent identical calls.
+
+    Unlike a cache nothing is kept once the call returns, which suits calls
+    such as LLM requests that are not cached but are expensive to duplicate.
+    """
+    flight = SingleFlight()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = (args, tuple(sorted(kwargs.items())))
+        return flight.do(key, func, *args, **kwargs)
+
+    return wrapper
+
+
+class StaleWhileRevalidateCache:
+    """
+    In-process cache around a fetch function that never makes a caller wait
+    on an expired entry while it is still within its maximum staleness.
+
+    Concurrent misses for the same arguments, from any session or from the
+    background refresher, share a single upstream fetch.
+
+    If a fetch fails and any earlier value exists, that value is returned
+    regardless of age rather than surfacing the error.
+
+    When a shared backend is configured, entries are also written to it and
+    read back on a local miss, so app workers warm each other's caches and
+    keep them across restarts.
+
+    Cached values are shared between callers and must not be modified.
+    """
+
+    def __init__(self, func: Callable, data_type: str, max_entries: int = 256):
+        self.func = func
+        self.data_type = data_type
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, Tuple[object, float]]" = OrderedDict()
+        self._refreshing = set()
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._namespace = f"{func.__module__}.{func.__qualname__}"
+        functools.update_wrapper(self, func)
+
+    def __call__(self, *args):
+        ttl, max_stale = get_policy(self.data_type)
+        entry = self._get_entry(args)
+        if entry is not None:
+            value, fetched_at = entry
+            age = time.time() - fetched_at
+            if age < ttl:
+                return value
+            if age < ttl + max_stale:
+                self._refresh_in_background(args)
+                return value
+
+        try:
+            return self._fetch(args)
+        except Exception:
+            # Degrade to the last good value, however old, while upstream fails
+            if entry is not None:
+                return entry[0]
+            raise
+
+    def _get_entry(self, args: tuple) -> Optional[Tuple[object, float]]:
+        """Look an entry up in memory, falling back to the shared backend"""
+        with self._lock:
+            entry = self._entries.get(args)
+            if entry is not None:
+                self._entries.move_to_end(args)
+                return entry
+
+        entry = self._load_shared(args)
+        if entry is not None:
+            self._remember(args, *entry)
+        return entry
+
+    def _load_shared(self, args: tuple) -> Optional[Tuple[object, float]]:
+        """Read an entry from the shared backend, treating errors as a miss"""
+        backend = get_backend()
+        if backend is None:
+            return None
+        try:
+            return backend.get(self._namespace, repr(args))
+        except Exception:
+            return None
+
+    def _remember(self, args: tuple, value, fetched_at: float):
+        """Store an entry in memory, evicting the least recently used"""
+        with self._lock:
+            self._entries[args] = (value, fetched_at)
+            self._entries.move_to_end(args)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _fetch(self, args: tuple):
+        """Fetch and store a value, joining an identical fetch in flight"""
+        return self._flight.do(args, self._fetch_and_store, args)
+
+    def _fetch_and_store(self, args: tuple):
+        """Call the wrapped function and store its result"""
+        # Another worker may already have refreshed this entry
+        ttl, _ = get_policy(self.data_type)
+        shared = self._load_shared(args)
+        if shared is not None and time.time() - shared[1] < ttl:
+            self._remember(args, *shared)
+            return shared[0]
+
+        value = self.func(*args)
+        fetched_at = time.time()
+        self._remember(args, value, fetched_at)
+        backend = get_backend()
+        if backend is not None:
+            try:
+                backend.set(self._namespace, repr(args), value, fetched_at)
+            except Exception:
+                # The shared tier is an optimisation; never fail a fetch on it
+                pass
+        return value
+
+    def _refresh_in_background(self, args: tuple):
+        """Schedule a refresh of an entry unless one is already running"""
+        with self._lock:
+            if args in self._refreshing:
+                return
+            self._refreshing.add(args)
+
+        def refresh():
+            try:
+                self._fetch(args)
+            except Exception:
+                # Keep serving the last good value; the next call retries
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing.discard(args)
+
+        _refresh_pool.submit(refresh)
+
+    def clear(self):
+        """Drop every cached entry, including those in the shared backend"""
+        with self._lock:
+            self._entries.clear()
+        backend = get_backend()
+        if backend is not None:
+            backend.clear(self._namespace)
+
+
+def swr_cache(data_type: str, max_entries: int = 256) -> Callable:
+    """
+    Decorator caching a fetch function in stale-while-revalidate mode.
+
+    Args:
+        data_type: Key into CACHE_POLICIES selecting ttl and max staleness
+        max_entries: Number of argument combinations kept in memory
+
+    Returns:
+        Decorator wrapping the function in a StaleWhileRevalidateCache
+    """
+    get_policy(data_type)
+
+    def decorator(func: Callable) -> StaleWhileRevalidateCache:
+        return StaleWhileRevalidateCache(func, data_type, max_entries)
+
+    return decorator
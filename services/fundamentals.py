@@ -0,0 +1,189 @@
+from typing import Dict
+
+import pandas as pd
+
+from services.cache import swr_cache
+from services.market_data import get_provider
+
+# Summary rows shown for a company: display name -> (statement, line item)
+SUMMARY_ROWS = {
+    'Revenue': ('income', 'Total Revenue'),
+    'Net Income': ('income', 'Net Income'),
+    'Total Assets': ('balance_sheet', 'Total Assets'),
+    'Total Liabilities': ('balance_sheet', 'Total Liabilities Net Minority Interest'),
+    'Operating Cash Flow': ('cash_flow', 'Operating Cash Flow'),
+    'Free Cash Flow': ('cash_flow', 'Free Cash Flow'),
+}
+
+# Valuation and risk ratios from the company info snapshot: display name -> info key
+KEY_RATIOS = {
+    'P/E Ratio': 'trailingPE',
+    'Forward P/E': 'forwardPE',
+    'PEG Ratio': 'pegRatio',
+    'Price to Book': 'priceToBook',
+    'Price to Sales': 'priceToSalesTrailing12Months',
+    'Dividend Yield (%)': 'dividendYield',
+    'Beta': 'beta',
+    '52 Week High': 'fiftyTwoWeekHigh',
+    '52 Week Low': 'fiftyTwoWeekLow',
+}
+
+# Line items used for peer comparison: column name -> (statement, line item)
+PEER_ITEMS = {
+    'Revenue': ('income', 'Total Revenue'),
+    'Gross Profit': ('income', 'Gross Profit'),
+    'Operating Income': ('income', 'Operating Income'),
+    'Net Income': ('income', 'Net Income'),
+    'Total Assets': ('balance_sheet', 'Total Assets'),
+    'Total Debt': ('balance_sheet', 'Total Debt'),
+    'Free Cash Flow': ('cash_flow', 'Free Cash Flow'),
+}
+
+
+@swr_cache("income_statement")
+def get_income_statement(symbol: str) -> pd.DataFrame:
+    """Annual income statement, line items by fiscal year"""
+    return get_provider().financials(symbol)
+
+
+@swr_cache("balance_sheet")
+def get_balance_sheet(symbol: str) -> pd.DataFrame:
+    """Annual balance sheet, line items by fiscal year"""
+    return get_provider().balance_sheet(symbol)
+
+
+@swr_cache("cash_flow")
+def get_cash_flow(symbol: str) -> pd.DataFrame:
+    """Annual cash flow statement, line items by fiscal year"""
+    return get_provider().cashflow(symbol)
+
+
+# Cached fetch function for each statement, keyed like get_statements' result
+STATEMENT_GETTERS = {
+    'income': get_income_statement,
+    'balance_sheet': get_balance_sheet,
+    'cash_flow': get_cash_flow,
+}
+
+
+def get_statements(symbol: str) -> Dict[str, pd.DataFrame]:
+    """
+    All three annual statements for a symbol, each from its own cache.
+
+    Args:
+        symbol: Stock symbol
+
+    Returns:
+        Dictionary with income, balance_sheet and cash_flow DataFrames
+    """
+    return {name: getter(symbol) for name, getter in STATEMENT_GETTERS.items()}
+
+
+def summarize_statements(statements: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Pick the summary rows out of the annual statements.
+
+    Line items a company does not report, or reports only as NaN, are left out.
+
+    Args:
+        statements: Statements as returned by get_statements
+
+    Returns:
+        DataFrame with one row per summary item and one column per fiscal
+        year, empty if nothing is available
+    """
+    rows = {}
+    for name, (statement, item) in SUMMARY_ROWS.items():
+        frame = statements.get(statement)
+        if frame is None or item not in frame.index:
+            continue
+        values = frame.loc[item]
+        if values.notna().any():
+            rows[name] = values
+    if not rows:
+        return pd.DataFrame()
+    return pd.DataFrame(rows).T
+
+
+def key_ratios(info: dict) -> pd.DataFrame:
+    """
+    Valuation and risk ratios from a company info snapshot.
+
+    Args:
+        info: Company info as returned by get_ticker_info
+
+    Returns:
+        DataFrame with Metric and Value columns; missing values are 'N/A'
+    """
+    return pd.DataFrame({
+        'Metric': list(KEY_RATIOS),
+        'Value': [info.get(key, 'N/A') for key in KEY_RATIOS.values()],
+    })
+
+
+def align_statements(statements: Dict[str, Dict[str, pd.DataFrame]]) -> pd.DataFrame:
+    """
+    Line up the latest two fiscal years of several companies.
+
+    Companies with different fiscal year ends are compared on their own
+    latest reported year.
+
+    Args:
+        statements: Statements as returned by get_statements, keyed by symbol
+
+    Returns:
+        DataFrame indexed by symbol with (year, item) columns, where year 0
+        is the latest fiscal year and 1 the one before, plus a
+        ('Fiscal Year End', '') column
+    """
+    rows = {}
+    for symbol, by_name in statements.items():
+        row = {}
+        for item, (name, line_item) in PEER_ITEMS.items():
+            frame = by_name.get(name)
+            if frame is None or line_item not in frame.index:
+                continue
+            values = frame.loc[line_item].sort_index(ascending=False)
+            for year, value in enumerate(values.iloc[:2]):
+                row[(year, item)] = value
+        income = by_name.get('income')
+        if income is not None and len(income.columns):
+            row[('Fiscal Year End', '')] = max(income.columns)
+        rows[symbol] = row
+    columns = pd.MultiIndex.from_tuples(
+        [(year, item) for year in (0, 1) for item in PEER_ITEMS] + [('Fiscal Year End', '')])
+    # Companies without any statement data keep an all-NaN row
+    return pd.DataFrame.from_dict(rows, orient='index').reindex(index=list(statements), columns=columns)
+
+
+def peer_ratios(aligned: pd.DataFrame, market_caps: pd.Series) -> pd.DataFrame:
+    """
+    Derived ratios for every company at once, as column operations.
+
+    Ratios with a zero or missing denominator are NaN.
+
+    Args:
+        aligned: Statements as returned by align_statements
+        market_caps: Market capitalization by symbol
+
+    Returns:
+        DataFrame indexed by symbol with margins, growth, leverage and
+        free cash flow yield as fractions, plus revenue and market cap
+    """
+    latest = aligned[0].apply(pd.to_numeric, errors='coerce')
+    previous = aligned[1].apply(pd.to_numeric, errors='coerce')
+    market_caps = pd.to_numeric(market_caps.reindex(aligned.index), errors='coerce')
+    revenue = latest['Revenue']
+    ratios = pd.DataFrame({
+        'Fiscal Year End': aligned[('Fiscal Year End', '')],
+        'Revenue': revenue,
+        'Market Cap': market_caps,
+        'Gross Margin': latest['Gross Profit'] / revenue,
+        'Operating Margin': latest['Operating Income'] / revenue,
+        'Net Margin': latest['Net Income'] / revenue,
+        'Revenue Growth': revenue / previous['Revenue'] - 1,
+        'Net Income Growth': (latest['Net Income'] - previous['Net Income']) / previous['Net Income'].abs(),
+        'Debt / Assets': latest['Total Debt'] / latest['Total Assets'],
+        'FCF Yield': latest['Free Cash Flow'] / market_caps,
+    }, index=aligned.index)
+    return ratios.replace([float('inf'), float('-inf')], float('nan'))
@@ -0,0 +1,148 @@
+import os
+import json
+import time
+import tempfile
+from typing import Optional
+
+import pandas as pd
+
+from services.market_data import get_provider
+
+# Where the per-symbol Parquet files live; shared by every process on the box
+HISTORY_DIR = os.environ.get("HISTORY_STORE_DIR", os.path.join(".cache", "history"))
+
+# How long a stored history is trusted before we ask upstream for new bars
+REFRESH_INTERVAL = 3600
+
+
+class HistoryStore:
+    """
+    Persistent store of full daily OHLCV history, one Parquet file per symbol.
+
+    The first request for a symbol downloads its complete history. Later
+    refreshes only request the bars after the last stored timestamp and
+    append them, so keeping a symbol current costs one or two rows instead
+    of years of bars, and the data survives process restarts.
+    """
+
+    def __init__(self, root: str = HISTORY_DIR, refresh_interval: int = REFRESH_INTERVAL):
+        self.root = root
+        self.refresh_interval = refresh_interval
+
+    def _path(self, symbol: str) -> str:
+        """Return the Parquet file path for a symbol"""
+        safe_symbol = symbol.upper().replace(os.sep, "_")
+        return os.path.join(self.root, f"{safe_symbol}.parquet")
+
+    def load(self, symbol: str) -> Optional[pd.DataFrame]:
+        """Load the stored history for a symbol, or None if nothing is stored"""
+        path = self._path(symbol)
+        if not os.path.exists(path):
+            return None
+        try:
+            return pd.read_parquet(path)
+        except Exception:
+            # A corrupt or partially written file is treated as missing
+            return None
+
+    def save(self, symbol: str, df: pd.DataFrame):
+        """Atomically write the history for a symbol"""
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        os.close(fd)
+        try:
+            df.to_parquet(tmp_path)
+            os.replace(tmp_path, self._path(symbol))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def is_fresh(self, symbol: str) -> bool:
+        """Check whether the stored history was refreshed recently enough"""
+        path = self._path(symbol)
+        if not os.path.exists(path):
+            return False
+        return time.time() - os.path.getmtime(path) < self.refresh_interval
+
+    def get(self, symbol: str) -> Optional[pd.DataFrame]:
+        """
+        Return the full daily history for a symbol, fetching only new bars.
+
+        Args:
+            symbol: Stock symbol
+
+        Returns:
+            DataFrame with the complete daily OHLCV history, or None if
+            upstream has no data for the symbol
+        """
+        stored = self.load(symbol)
+        if stored is not None and not stored.empty and self.is_fresh(symbol):
+            return stored
+
+        try:
+            combined = self._fetch(symbol, stored)
+        except Exception:
+            # Serve what we have while upstream is throttled or down
+            if stored is not None and not stored.empty:
+                return stored
+            raise
+        if combined is stored:
+            os.utime(self._path(symbol))
+            return stored
+
+        if combined.empty:
+            return stored
+        self.save(symbol, combined)
+        return combined
+
+    def _fetch(self, symbol: str, stored: Optional[pd.DataFrame]) -> pd.DataFrame:
+        """Fetch full history, or the bars after the stored ones appended to them"""
+        provider = get_provider()
+        if stored is None or stored.empty:
+            return provider.history(symbol, period="max")
+
+        # Re-request the last stored day as well: it may have been an
+        # incomplete intraday bar when it was saved
+        new_bars = provider.history(symbol, start=str(stored.index[-1].date()))
+        if new_bars.empty:
+            return stored
+        if self._has_corporate_action(new_bars[new_bars.index > stored.index[-1]]):
+            # Prices are split/dividend adjusted, so a new corporate action
+            # rewrites the whole history and appending is no longer valid
+            return provider.history(symbol, period="max")
+        return pd.concat([stored[stored.index < new_bars.index[0]], new_bars])
+
+    def _checkpoint_path(self, symbol: str, name: str) -> str:
+        """Return the path of a named checkpoint stored next to a symbol's history"""
+        return self._path(symbol)[:-len(".parquet")] + f".{name}.json"
+
+    def save_checkpoint(self, symbol: str, name: str, checkpoint: dict):
+        """
+        Atomically store derived state (e.g. indicator state) for a symbol.
+
+        Args:
+            symbol: Stock symbol
+            name: Name of the checkpoint
+            checkpoint: JSON-compatible dictionary
+        """
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, self._checkpoint_path(symbol, name))
+
+    def load_checkpoint(self, symbol: str, name: str) -> Optional[dict]:
+        """Load a checkpoint saved with save_checkpoint, or None if there is none"""
+        try:
+            with open(self._checkpoint_path(symbol, name)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _has_corporate_action(bars: pd.DataFrame) -> bool:
+        """Check whether any bar carries a dividend or stock split"""
+        for column in ("Dividends", "Stock Splits"):
+            if column in bars.columns and (bars[column].fillna(0) != 0).any():
+                return True
+        return False
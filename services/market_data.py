@@ -0,0 +1,266 @@
+import os
+import json
+import pickle
+import hashlib
+import tempfile
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+import pandas as pd
+import yfinance as yf
+
+from services.resilience import CircuitBreaker, TokenBucket, UpstreamUnavailable
+
+# Which provider get_provider() builds: "yfinance", "record" or "replay"
+PROVIDER_NAME = os.environ.get("MARKET_DATA_PROVIDER", "yfinance")
+
+# Directory the record/replay provider reads and writes responses in
+RECORDINGS_DIR = os.environ.get("MARKET_DATA_RECORDINGS", os.path.join(".cache", "recordings"))
+
+# (requests per second, burst size) allowed upstream for each endpoint. The
+# info and statement bursts cover a cold 20-company peer comparison, which
+# fetches every one of them once per company.
+RATE_LIMITS = {
+    "history": (2.0, 10),
+    "info": (2.0, 25),
+    "dividends": (1.0, 5),
+    "financials": (1.0, 25),
+    "balance_sheet": (1.0, 25),
+    "cashflow": (1.0, 25),
+    "download": (0.5, 2),
+}
+
+# Longest a call waits for rate-limit budget before giving up
+RATE_LIMIT_TIMEOUT = 5.0
+
+
+class MarketDataProvider(ABC):
+    """
+    Interface every market data source implements.
+
+    Components and data helpers only talk to this interface, so feeds can be
+    swapped without touching them.
+    """
+
+    @abstractmethod
+    def history(self, symbol: str, period: Optional[str] = None,
+                start: Optional[str] = None, interval: str = "1d") -> pd.DataFrame:
+        """Return OHLCV bars for a period, or from a start date to now"""
+
+    @abstractmethod
+    def info(self, symbol: str) -> dict:
+        """Return the company info snapshot"""
+
+    @abstractmethod
+    def dividends(self, symbol: str) -> pd.Series:
+        """Return the dividend history"""
+
+    @abstractmethod
+    def financials(self, symbol: str) -> pd.DataFrame:
+        """Return the annual income statement"""
+
+    @abstractmethod
+    def balance_sheet(self, symbol: str) -> pd.DataFrame:
+        """Return the annual balance sheet"""
+
+    @abstractmethod
+    def cashflow(self, symbol: str) -> pd.DataFrame:
+        """Return the annual cash flow statement"""
+
+    @abstractmethod
+    def download(self, symbols: List[str], period: str, interval: str = "1d") -> pd.DataFrame:
+        """Return bars for several symbols with (field, symbol) column levels"""
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Market data straight from Yahoo Finance"""
+
+    def history(self, symbol, period=None, start=None, interval="1d"):
+        if start is not None:
+            return yf.Ticker(symbol).history(start=start, interval=interval)
+        return yf.Ticker(symbol).history(period=period, interval=interval)
+
+    def info(self, symbol):
+        return yf.Ticker(symbol).info or {}
+
+    def dividends(self, symbol):
+        return yf.Ticker(symbol).dividends
+
+    def financials(self, symbol):
+        return yf.Ticker(symbol).financials
+
+    def balance_sheet(self, symbol):
+        return yf.Ticker(symbol).balance_sheet
+
+    def cashflow(self, symbol):
+        return yf.Ticker(symbol).cashflow
+
+    def download(self, symbols, period, interval="1d"):
+        return yf.download(list(symbols), period=period, interval=interval,
+                           progress=False, multi_level_index=True)
+
+
+class RecordReplayProvider(MarketDataProvider):
+    """
+    File-backed provider that records responses and replays them.
+
+    In "record" mode every call is forwarded to the wrapped provider and the
+    response is written to disk. In "replay" mode responses are served only
+    from those files, so the app runs deterministically and fully offline.
+    Recordings are pickles; only replay directories you created yourself.
+    """
+
+    def __init__(self, root: str = RECORDINGS_DIR, inner: Optional[MarketDataProvider] = None,
+                 mode: str = "replay"):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown mode: {mode}")
+        if mode == "record" and inner is None:
+            raise ValueError("Record mode needs a provider to record from")
+        self.root = root
+        self.inner = inner
+        self.mode = mode
+
+    def _path(self, method: str, args: tuple) -> str:
+        """Return the recording path for a call"""
+        key = json.dumps([method, list(args)], default=str, sort_keys=True)
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.root, f"{method}-{digest}.pkl")
+
+    def _call(self, method: str, *args):
+        path = self._path(method, args)
+        if self.mode == "replay":
+            if not os.path.exists(path):
+                raise LookupError(f"No recorded response for {method}{args}")
+            with open(path, "rb") as f:
+                return pickle.load(f)
+
+        result = getattr(self.inner, method)(*args)
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(result, f)
+        os.replace(tmp_path, path)
+        return result
+
+    def history(self, symbol, period=None, start=None, interval="1d"):
+        return self._call("history", symbol, period, start, interval)
+
+    def info(self, symbol):
+        return self._call("info", symbol)
+
+    def dividends(self, symbol):
+        return self._call("dividends", symbol)
+
+    def financials(self, symbol):
+        return self._call("financials", symbol)
+
+    def balance_sheet(self, symbol):
+        return self._call("balance_sheet", symbol)
+
+    def cashflow(self, symbol):
+        return self._call("cashflow", symbol)
+
+    def download(self, symbols, period, interval="1d"):
+        return self._call("download", list(symbols), period, interval)
+
+
+class GuardedProvider(MarketDataProvider):
+    """
+    Wraps a provider with per-endpoint rate limits and a circuit breaker.
+
+    Calls over budget wait briefly for a token, and once upstream keeps
+    failing every call fails fast with UpstreamUnavailable, so callers can
+    fall back to cached data instead of hanging on a dead connection.
+    """
+
+    def __init__(self, inner: MarketDataProvider, rate_limits: dict = None,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.inner = inner
+        self.buckets = {
+            endpoint: TokenBucket(rate, capacity)
+            for endpoint, (rate, capacity) in (rate_limits or RATE_LIMITS).items()
+        }
+        self.breaker = breaker or CircuitBreaker()
+
+    def _call(self, endpoint: str, *args):
+        # Check the breaker first so rejected calls neither wait nor spend budget
+        if not self.breaker.allow():
+            raise UpstreamUnavailable("Market data provider is unavailable, retrying shortly")
+        bucket = self.buckets.get(endpoint)
+        if bucket is not None and not bucket.acquire(RATE_LIMIT_TIMEOUT):
+            self.breaker.cancel()
+            raise UpstreamUnavailable(f"Rate limit exceeded for {endpoint} requests")
+        try:
+            result = getattr(self.inner, endpoint)(*args)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def history(self, symbol, period=None, start=None, interval="1d"):
+        return self._call("history", symbol, period, start, interval)
+
+    def info(self, symbol):
+        return self._call("info", symbol)
+
+    def dividends(self, symbol):
+        return self._call("dividends", symbol)
+
+    def financials(self, symbol):
+        return self._call("financials", symbol)
+
+    def balance_sheet(self, symbol):
+        return self._call("balance_sheet", symbol)
+
+    def cashflow(self, symbol):
+        return self._call("cashflow", symbol)
+
+    def download(self, symbols, period, interval="1d"):
+        return self._call("download", symbols, period, interval)
+
+
+_provider: Optional[MarketDataProvider] = None
+
+
+def create_provider(name: str = PROVIDER_NAME) -> MarketDataProvider:
+    """
+    Build a provider by name.
+
+    Args:
+        name: "yfinance", "record" (yfinance, recording to disk) or "replay"
+
+    Returns:
+        Market data provider; live ones are rate limited and circuit broken
+    """
+    if name == "yfinance":
+        return GuardedProvider(YFinanceProvider())
+    if name == "record":
+        return RecordReplayProvider(inner=GuardedProvider(YFinanceProvider()), mode="record")
+    if name == "replay":
+        return RecordReplayProvider(mode="replay")
+    raise ValueError(f"Unknown market data provider: {name}")
+
+
+def get_provider() -> MarketDataProvider:
+    """Return the process-wide market data provider"""
+    global _provider
+    if _provider is None:
+        _provider = create_provider()
+    return _provider
+
+
+def is_upstream_healthy() -> bool:
+    """Check whether the live provider's circuit breaker is closed"""
+    provider = get_provider()
+    if isinstance(provider, RecordReplayProvider):
+        provider = provider.inner
+    if isinstance(provider, GuardedProvider):
+        return not provider.breaker.is_open
+    return True
+
+
+def set_provider(provider: MarketDataProvider):
+    """Replace the process-wide market data provider, e.g. for benchmarks"""
+    global _provider
+    _provider = provider
@@ -0,0 +1,100 @@
+import time
+import threading
+
+
+class UpstreamUnavailable(Exception):
+    """Raised instead of calling upstream when it is throttled or unhealthy"""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting how often an endpoint is called.
+
+    Tokens refill continuously at `rate` per second up to `capacity`, so short
+    bursts are allowed while the sustained rate stays within budget.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout: float) -> bool:
+        """
+        Take a token, waiting up to `timeout` seconds for one to become free.
+
+        Returns:
+            True if a token was taken, False if the timeout expired first
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Stops calls to an upstream that keeps failing.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls are rejected immediately. Once `reset_timeout` seconds have passed a
+    single trial call is let through; its outcome closes or re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        """Whether calls are currently being rejected"""
+        with self._lock:
+            return self._opened_at is not None
+
+    def allow(self) -> bool:
+        """Check whether a call may go upstream now"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial_running or time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self._trial_running = True
+            return True
+
+    def cancel(self):
+        """Give back a call that was allowed but never made, e.g. when throttled"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_success(self):
+        """Close the circuit after a successful call"""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        """Count a failed call, opening the circuit past the threshold"""
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_running = False
@@ -0,0 +1,21 @@
+"""
+Units of the health rules' inputs, as build_health_context reports them.
+"""
+import pandas as pd
+import pytest
+
+from components.health_rules import STRENGTH_THRESHOLD, local_health_score, metric_values, rule_scores
+
+
+def sub_score(field, value):
+    return rule_scores(metric_values(pd.DataFrame([{field: value}])))[field].iloc[0]
+
+
+@pytest.mark.parametrize("percent", [2.5, 3.0, 4.0])
+def test_dividend_yield_is_in_percent(percent):
+    assert sub_score("dividend_yield", percent) >= STRENGTH_THRESHOLD
+    assert f"Dividend yield of {percent:.2f}%" in local_health_score({"dividend_yield": percent})["strengths"]
+
+
+def test_small_dividend_is_not_a_risk():
+    assert sub_score("dividend_yield", 0.44) > sub_score("dividend_yield", 12)
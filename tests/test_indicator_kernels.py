@@ -0,0 +1,68 @@
+"""
+Parity of the NumPy indicator kernels with the pandas indicator graph.
+
+compute_indicators may only switch backends safely while the kernels
+reproduce evaluate_indicators: the same NaN positions and values within
+PARITY_TOLERANCE of each column's scale.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.fixtures import make_ohlcv
+from components.indicators import evaluate_indicators
+from components.indicator_kernels import KERNEL_COLUMNS, compute_indicator_arrays
+
+# Largest difference allowed, relative to the column's largest absolute value
+PARITY_TOLERANCE = 1e-9
+
+def with_nan(close: np.ndarray, *positions) -> np.ndarray:
+    """Copy of close with NaN at the given positions or slices"""
+    close = close.copy()
+    for position in positions:
+        close[position] = np.nan
+    return close
+
+
+SERIES = {
+    "empty": np.array([]),
+    "flat": np.full(300, 50.0),
+    "flat_then_step": np.r_[np.full(150, 50.0), np.full(150, 51.0)],
+    "shorter_than_windows": make_ohlcv(5)["Close"].to_numpy(),
+    "short": make_ohlcv(25)["Close"].to_numpy(),
+    "one_year": make_ohlcv(252)["Close"].to_numpy(),
+    "high_priced": make_ohlcv(1260)["Close"].to_numpy() * 7000,
+    "long_intraday": make_ohlcv(3 * 252 * 78, "5min")["Close"].to_numpy(),
+    "one_nan": with_nan(make_ohlcv(500)["Close"].to_numpy(), 250),
+    "scattered_nan": with_nan(make_ohlcv(1000)["Close"].to_numpy(), 3, slice(100, 104), 420, 421, 999),
+    "leading_nan": with_nan(make_ohlcv(300)["Close"].to_numpy(), slice(0, 40)),
+    "long_gap": with_nan(make_ohlcv(12000)["Close"].to_numpy(), slice(2000, 9000)),
+    "all_nan": np.full(50, np.nan),
+}
+
+
+@pytest.mark.parametrize("name", SERIES)
+def test_kernels_match_pandas(name):
+    close = SERIES[name]
+    expected = evaluate_indicators(pd.DataFrame({"Close": close}), KERNEL_COLUMNS)
+    actual = compute_indicator_arrays(close, KERNEL_COLUMNS)
+
+    for column in KERNEL_COLUMNS:
+        want, got = expected[column].to_numpy(dtype=np.float64), actual[column]
+        np.testing.assert_array_equal(np.isnan(got), np.isnan(want), err_msg=f"NaN positions of {column}")
+        present = ~np.isnan(want)
+        if not present.any():
+            continue
+        scale = np.abs(want[present]).max() or 1.0
+        np.testing.assert_allclose(got[present], want[present], rtol=0, atol=PARITY_TOLERANCE * scale,
+                                   err_msg=column)
+
+
+def test_rows_match_single_series():
+    closes = np.stack([make_ohlcv(500, seed=seed)["Close"].to_numpy() for seed in range(3)])
+    batch = compute_indicator_arrays(closes, KERNEL_COLUMNS)
+    for row, close in enumerate(closes):
+        single = compute_indicator_arrays(close, KERNEL_COLUMNS)
+        for column in KERNEL_COLUMNS:
+            np.testing.assert_allclose(batch[column][row], single[column], rtol=1e-12, equal_nan=True,
+                                       err_msg=column)
@@ -0,0 +1,130 @@
+"""
+Incremental indicator state against a full recompute, including saving
+and restoring it through the history store's checkpoints.
+"""
+import json
+
+import numpy as np
+import pytest
+
+from benchmarks.fixtures import make_ohlcv
+from components.chart import calculate_technical_indicators
+from components.indicator_kernels import KERNEL_COLUMNS
+from components.indicator_state import STATE_VERSION, IndicatorState, sync_indicator_state
+from services.history_store import HistoryStore
+
+CHECKPOINT = "indicators"
+
+
+def assert_matches_recompute(state, data):
+    """Check a state's values against the last row of a full recompute"""
+    expected = calculate_technical_indicators(data).iloc[-1]
+    actual = state.values()
+    for column in KERNEL_COLUMNS:
+        np.testing.assert_allclose(actual[column], expected[column], rtol=1e-9, atol=1e-9, equal_nan=True,
+                                   err_msg=column)
+
+
+def revised(data, close):
+    """Copy of data with the latest bar's close replaced"""
+    data = data.copy()
+    data.iloc[-1, data.columns.get_loc("Close")] = close
+    return data
+
+
+@pytest.mark.parametrize("bars", [1, 15, 60, 600])
+def test_from_history_matches_recompute(bars):
+    data = make_ohlcv(bars)
+    assert_matches_recompute(IndicatorState.from_history(data["Close"]), data)
+
+
+def test_every_update_matches_recompute():
+    data = make_ohlcv(260)
+    state = IndicatorState()
+    for end in range(1, len(data) + 1):
+        state.update(data["Close"].iloc[end - 1], data.index[end - 1])
+        if end in (1, 14, 20, 26, 50, 200, 260):
+            assert_matches_recompute(state, data.iloc[:end])
+
+
+def test_checkpoint_round_trip(tmp_path):
+    data = make_ohlcv(400)
+    store = HistoryStore(root=str(tmp_path))
+    store.save_checkpoint("TEST", CHECKPOINT, IndicatorState.from_history(data["Close"].iloc[:300]).to_dict())
+
+    state = IndicatorState.from_dict(store.load_checkpoint("TEST", CHECKPOINT))
+    assert state is not None
+    state = sync_indicator_state(state, data["Close"])
+    assert_matches_recompute(state, data)
+
+
+def test_same_timestamp_revises_latest_bar():
+    data = make_ohlcv(300)
+    state = IndicatorState.from_history(data["Close"])
+    for close in (data["Close"].iloc[-1] * 1.05, data["Close"].iloc[-1] * 0.9):
+        state.update(close, data.index[-1])
+        assert_matches_recompute(state, revised(data, close))
+
+
+def test_revision_after_restore():
+    # An intraday refresh revises the bar that was current when the state was saved
+    data = make_ohlcv(300)
+    checkpoint = json.loads(json.dumps(IndicatorState.from_history(data["Close"]).to_dict()))
+    updated = revised(data, data["Close"].iloc[-1] * 1.03)
+
+    state = sync_indicator_state(IndicatorState.from_dict(checkpoint), updated["Close"])
+    assert_matches_recompute(state, updated)
+
+    state.update(updated["Close"].iloc[-1] * 0.98, updated.index[-1])
+    assert_matches_recompute(state, revised(updated, updated["Close"].iloc[-1] * 0.98))
+
+
+def test_rewritten_history_is_rebuilt():
+    data = make_ohlcv(300)
+    state = IndicatorState.from_history(data["Close"].iloc[:250])
+    split = data.copy()
+    split["Close"] /= 4
+    assert_matches_recompute(sync_indicator_state(state, split["Close"]), split)
+
+
+def test_checkpoint_from_other_version_is_ignored(tmp_path):
+    checkpoint = IndicatorState.from_history(make_ohlcv(30)["Close"]).to_dict()
+    checkpoint["version"] = STATE_VERSION + 1
+    assert IndicatorState.from_dict(checkpoint) is None
+    assert HistoryStore(root=str(tmp_path)).load_checkpoint("MISSING", CHECKPOINT) is None
+
+
+def with_nan(data, *positions):
+    """Copy of data with missing closes at the given positions or slices"""
+    data = data.copy()
+    column = data.columns.get_loc("Close")
+    for position in positions:
+        data.iloc[position, column] = np.nan
+    return data
+
+
+@pytest.mark.parametrize("positions", [(250,), (0, 1, 2), (slice(100, 130), 260, 399)])
+def test_missing_closes_match_recompute(positions):
+    data = with_nan(make_ohlcv(400), *positions)
+    state = IndicatorState()
+    for end in range(1, len(data) + 1):
+        state.update(data["Close"].iloc[end - 1], data.index[end - 1])
+        if end % 25 == 0 or end == len(data):
+            assert_matches_recompute(state, data.iloc[:end])
+
+
+def test_missing_close_through_checkpoint_and_revision(tmp_path):
+    data = with_nan(make_ohlcv(300), 150, 299)
+    store = HistoryStore(root=str(tmp_path))
+    store.save_checkpoint("TEST", CHECKPOINT, IndicatorState.from_history(data["Close"].iloc[:280]).to_dict())
+
+    state = sync_indicator_state(IndicatorState.from_dict(store.load_checkpoint("TEST", CHECKPOINT)),
+                                 data["Close"])
+    assert_matches_recompute(state, data)
+
+    # The missing latest close arrives
+    state.update(101.5, data.index[-1])
+    assert_matches_recompute(state, revised(data, 101.5))
+    # and restoring the state again gives the same result
+    resumed = sync_indicator_state(IndicatorState.from_dict(state.to_dict()), revised(data, 101.5)["Close"])
+    assert resumed.to_dict() == state.to_dict()
@@ -0,0 +1,97 @@
+"""
+Peer comparison table built from a fake provider, including companies
+whose data fails to load.
+"""
+import pandas as pd
+import pytest
+
+from services import market_data
+from services.market_data import MarketDataProvider
+from services.fundamentals import STATEMENT_GETTERS
+from utils import get_ticker_info
+from components.metrics import create_peer_comparison_table
+
+YEARS = pd.to_datetime(["2024-12-31", "2023-12-31"])
+
+
+def statement(items: dict) -> pd.DataFrame:
+    """Statement with line items as rows and fiscal years as columns"""
+    return pd.DataFrame(items, index=YEARS).T
+
+
+class FakeProvider(MarketDataProvider):
+    """Serves fixed statements; symbols in `failing` raise on every call"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+
+    def _check(self, symbol):
+        if symbol in self.failing:
+            raise RuntimeError(f"No data for {symbol}")
+
+    def history(self, symbol, period=None, start=None, interval="1d"):
+        raise NotImplementedError
+
+    def info(self, symbol):
+        self._check(symbol)
+        return {"longName": f"{symbol} Inc.", "marketCap": 1000.0}
+
+    def dividends(self, symbol):
+        raise NotImplementedError
+
+    def financials(self, symbol):
+        self._check(symbol)
+        return statement({"Total Revenue": [200.0, 100.0], "Gross Profit": [100.0, 40.0],
+                          "Operating Income": [50.0, 20.0], "Net Income": [20.0, 10.0]})
+
+    def balance_sheet(self, symbol):
+        self._check(symbol)
+        return statement({"Total Assets": [400.0, 300.0], "Total Debt": [100.0, 90.0]})
+
+    def cashflow(self, symbol):
+        self._check(symbol)
+        return statement({"Free Cash Flow": [30.0, 25.0]})
+
+    def download(self, symbols, period, interval="1d"):
+        raise NotImplementedError
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    def install(failing=()):
+        monkeypatch.setattr(market_data, "_provider", FakeProvider(failing))
+        for getter in (*STATEMENT_GETTERS.values(), get_ticker_info):
+            getter.clear()
+    yield install
+    for getter in (*STATEMENT_GETTERS.values(), get_ticker_info):
+        getter.clear()
+
+
+def test_ratios(provider):
+    provider()
+    table = create_peer_comparison_table(("AAPL", "MSFT"))
+    assert list(table.index) == ["AAPL", "MSFT"]
+    row = table.loc["AAPL"]
+    assert row["Name"] == "AAPL Inc."
+    assert row["Gross Margin"] == pytest.approx(0.5)
+    assert row["Revenue Growth"] == pytest.approx(1.0)
+    assert row["Debt / Assets"] == pytest.approx(0.25)
+    assert row["FCF Yield"] == pytest.approx(0.03)
+    assert table["Error"].isna().all()
+
+
+def test_failing_peer_keeps_row_with_error(provider):
+    provider(failing={"BAD"})
+    table = create_peer_comparison_table(("AAPL", "BAD", "MSFT"))
+    assert list(table.index) == ["AAPL", "BAD", "MSFT"]
+    assert table.loc["BAD", "Name"] == "BAD"
+    assert "No data for BAD" in table.loc["BAD", "Error"]
+    assert table.loc["BAD", ["Revenue", "Gross Margin", "FCF Yield"]].isna().all()
+    assert table.loc[["AAPL", "MSFT"], "Error"].isna().all()
+
+
+def test_every_peer_failing(provider):
+    provider(failing={"BAD", "WORSE"})
+    table = create_peer_comparison_table(("BAD", "WORSE"))
+    assert list(table.index) == ["BAD", "WORSE"]
+    assert table["Error"].notna().all()
@@ -0,0 +1,173 @@
+"""
+Rate limiting and circuit breaking of upstream calls, driven by a fake
+clock so no test actually waits.
+"""
+import pytest
+
+from services import market_data, resilience
+from services.market_data import GuardedProvider, MarketDataProvider
+from services.resilience import CircuitBreaker, TokenBucket, UpstreamUnavailable
+
+
+class FakeClock:
+    """Replaces time.monotonic and time.sleep; sleeping advances the clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+        self.slept += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(resilience.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(resilience.time, "sleep", clock.sleep)
+    return clock
+
+
+class FakeProvider(MarketDataProvider):
+    """Counts info calls and fails them while `failing` is set"""
+
+    def __init__(self):
+        self.calls = 0
+        self.failing = False
+
+    def info(self, symbol):
+        self.calls += 1
+        if self.failing:
+            raise ConnectionError("upstream down")
+        return {"symbol": symbol}
+
+    def history(self, symbol, period=None, start=None, interval="1d"):
+        raise NotImplementedError
+
+    def dividends(self, symbol):
+        raise NotImplementedError
+
+    def financials(self, symbol):
+        raise NotImplementedError
+
+    def balance_sheet(self, symbol):
+        raise NotImplementedError
+
+    def cashflow(self, symbol):
+        raise NotImplementedError
+
+    def download(self, symbols, period, interval="1d"):
+        raise NotImplementedError
+
+
+def guarded(rate=1.0, capacity=2, failure_threshold=3, reset_timeout=30):
+    inner = FakeProvider()
+    provider = GuardedProvider(inner, rate_limits={"info": (rate, capacity)},
+                               breaker=CircuitBreaker(failure_threshold, reset_timeout))
+    return provider, inner
+
+
+def fail(provider, inner, times):
+    inner.failing = True
+    for _ in range(times):
+        with pytest.raises(ConnectionError):
+            provider.info("X")
+    inner.failing = False
+
+
+def test_bucket_allows_burst_then_waits_for_refill(clock):
+    bucket = TokenBucket(rate=2.0, capacity=3)
+    assert all(bucket.acquire(timeout=0) for _ in range(3))
+    assert not bucket.acquire(timeout=0.1)
+    assert bucket.acquire(timeout=1.0)
+    assert clock.slept == pytest.approx(0.5)
+
+
+def test_bucket_gives_up_without_waiting_past_timeout(clock):
+    bucket = TokenBucket(rate=0.1, capacity=1)
+    assert bucket.acquire(timeout=0)
+    assert not bucket.acquire(timeout=5.0)
+    assert clock.slept == 0
+
+
+def test_circuit_opens_after_threshold(clock):
+    provider, inner = guarded(capacity=10, failure_threshold=3)
+    fail(provider, inner, 2)
+    assert not provider.breaker.is_open
+    fail(provider, inner, 1)
+    assert provider.breaker.is_open
+
+    with pytest.raises(UpstreamUnavailable):
+        provider.info("X")
+    assert inner.calls == 3
+
+
+def test_success_resets_failure_count(clock):
+    provider, inner = guarded(capacity=10, failure_threshold=3)
+    fail(provider, inner, 2)
+    provider.info("X")
+    fail(provider, inner, 2)
+    assert not provider.breaker.is_open
+
+
+def test_only_one_trial_call_while_half_open(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    clock.now += 30
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert not breaker.is_open
+    assert breaker.allow()
+
+
+def test_failed_trial_reopens_for_another_timeout(clock):
+    provider, inner = guarded(capacity=10, failure_threshold=1, reset_timeout=30)
+    fail(provider, inner, 1)
+    clock.now += 30
+    fail(provider, inner, 1)
+
+    clock.now += 29
+    with pytest.raises(UpstreamUnavailable):
+        provider.info("X")
+    clock.now += 1
+    assert provider.info("X") == {"symbol": "X"}
+    assert not provider.breaker.is_open
+
+
+def test_throttled_trial_is_handed_back(clock, monkeypatch):
+    monkeypatch.setattr(market_data, "RATE_LIMIT_TIMEOUT", 0.5)
+    provider, inner = guarded(rate=0.01, capacity=1, failure_threshold=1, reset_timeout=30)
+    fail(provider, inner, 1)
+    clock.now += 30
+
+    # The trial is let through by the breaker but finds no rate-limit budget
+    with pytest.raises(UpstreamUnavailable, match="Rate limit"):
+        provider.info("X")
+    assert inner.calls == 1
+
+    # Without cancel() the breaker would wait forever for that trial's outcome
+    clock.now += 100
+    assert provider.info("X") == {"symbol": "X"}
+    assert not provider.breaker.is_open
+
+
+def test_rejected_calls_spend_no_budget_and_do_not_wait(clock):
+    provider, inner = guarded(rate=1.0, capacity=2, failure_threshold=1, reset_timeout=30)
+    fail(provider, inner, 1)
+    bucket = provider.buckets["info"]
+    tokens = bucket._tokens
+
+    for _ in range(20):
+        with pytest.raises(UpstreamUnavailable, match="unavailable"):
+            provider.info("X")
+    assert clock.slept == 0
+    assert bucket._tokens == tokens
+    assert inner.calls == 1
@@ -1,84 +1,349 @@
+import io
+import gzip
+import zipfile
 import streamlit as st
-import yfinance as yf
 import pandas as pd
+import pyarrow as pa
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Tuple
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from services.history_store import HistoryStore
+from services.market_data import get_provider
+from services.cache import swr_cache
+from services.fundamentals import get_statements
 
-@st.cache_data(ttl=3600)
-def get_stock_data(symbol: str, period: str) -> pd.DataFrame:
+# Lookback windows for the periods offered in the UI, applied to stored history
+PERIOD_OFFSETS = {
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
+# Export formats offered for downloads: label -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "CSV (gzip)": ("csv.gz", "application/gzip"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "Arrow": ("arrow", "application/vnd.apache.arrow.file"),
+}
+
+# Upper bound on concurrent upstream requests for multi-symbol fetches
+FETCH_WORKERS = 8
+
+history_store = HistoryStore()
+_fetch_pool = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="fetch")
+
+def submit_with_context(executor: ThreadPoolExecutor, func: Callable, *args) -> Future:
+    """
+    Start a function on an executor from the script thread.
+    
+    The worker thread inherits the caller's Streamlit context so cached
+    functions behave as they would on the script thread.
+    
+    Args:
+        executor: Executor to run the function on
+        func: Function to run
+        *args: Arguments for the function
+    
+    Returns:
+        Future resolving to the function's result
+    """
+    ctx = get_script_run_ctx()
+    
+    def run():
+        add_script_run_ctx(ctx=ctx)
+        return func(*args)
+    
+    return executor.submit(run)
+
+def submit_fetch(func: Callable, *args) -> Future:
+    """
+    Start a fetch on the shared bounded pool.
+    
+    Args:
+        func: Fetch function
+        *args: Arguments for the fetch function
+    
+    Returns:
+        Future resolving to the fetch result
+    """
+    return submit_with_context(_fetch_pool, func, *args)
+
+def fetch_concurrently(func: Callable, items: Iterable) -> Dict:
+    """
+    Run a fetch function over several items on the shared bounded pool.
+    
+    Args:
+        func: Function taking a single item
+        items: Items to fetch
+    
+    Returns:
+        Dictionary mapping each item to its result, or to the exception it raised
     """
-    Fetch stock data from Yahoo Finance with caching.
+    futures = {item: submit_fetch(func, item) for item in items}
+    results = {}
+    for item, future in futures.items():
+        try:
+            results[item] = future.result()
+        except Exception as e:
+            results[item] = e
+    return results
+
+def prefetch_symbol_data(symbol: str, period: str) -> Dict[str, Future]:
+    """
+    Start every upstream fetch the dashboard needs for a symbol at once.
+    
+    Sections call .result() on their future when they render, so the first
+    paint for a new symbol waits for the slowest request instead of the sum.
     
     Args:
         symbol: Stock symbol
         period: Time period for historical data
     
     Returns:
-        DataFrame with stock price data
+        Dictionary of futures keyed by history, info, dividends and statements
+    """
+    return {
+        "history": submit_fetch(get_stock_data, symbol, period),
+        "info": submit_fetch(get_ticker_info, symbol),
+        "dividends": submit_fetch(get_dividend_data, symbol),
+        "statements": submit_fetch(get_statements, symbol),
+    }
+
+@swr_cache("info")
+def get_ticker_info(symbol: str) -> dict:
+    """
+    Fetch the company info snapshot for a symbol with caching.
+    
+    Every component that needs company info should go through this function
+    so a page render makes a single upstream request per symbol.
+    
+    Args:
+        symbol: Stock symbol
+    
+    Returns:
+        Dictionary of company info as returned by the market data provider
+    """
+    return get_provider().info(symbol) or {}
+
+@swr_cache("quotes")
+def get_quotes(symbols: Tuple[str, ...]) -> pd.DataFrame:
+    """
+    Fetch latest quotes for several symbols at once.
+    
+    Prices for every symbol come from one bulk download; company names come
+    from the cached info snapshots, fetched concurrently on the shared pool.
+    Render time therefore tracks the slowest symbol rather than the sum.
+    
+    Args:
+        symbols: Stock symbols
+    
+    Returns:
+        DataFrame indexed by symbol with name, price, change_pct and error columns
     """
+    symbols = list(dict.fromkeys(symbols))
+    quotes = pd.DataFrame(index=pd.Index(symbols, name="symbol"),
+                          columns=["name", "price", "change_pct", "error"])
+    if not symbols:
+        return quotes
+    
+    infos = fetch_concurrently(get_ticker_info, symbols)
+    
     try:
-        stock = yf.Ticker(symbol)
-        df = stock.history(period=period)
-        return df if not df.empty else None
-    except Exception as e:
-        st.error(f"Error fetching data: {str(e)}")
-        return None
+        closes = get_provider().download(symbols, period="5d")["Close"]
+    except Exception:
+        closes = pd.DataFrame()
+    
+    for symbol in symbols:
+        info = infos[symbol]
+        if isinstance(info, Exception):
+            quotes.loc[symbol, ["name", "error"]] = [symbol, str(info)]
+            info = {}
+        else:
+            quotes.loc[symbol, "name"] = info.get("longName", symbol)
+        
+        history = closes[symbol].dropna() if symbol in closes else pd.Series(dtype=float)
+        if len(history) >= 2:
+            quotes.loc[symbol, "price"] = history.iloc[-1]
+            quotes.loc[symbol, "change_pct"] = (history.iloc[-1] / history.iloc[-2] - 1) * 100
+        else:
+            # Fall back to the info snapshot when the bulk download missed a symbol
+            quotes.loc[symbol, "price"] = info.get("currentPrice")
+            quotes.loc[symbol, "change_pct"] = info.get("regularMarketChangePercent")
+    
+    return quotes
 
-@st.cache_data(ttl=3600)
-def get_dividend_data(symbol: str) -> pd.DataFrame:
+@swr_cache("history")
+def get_full_history(symbol: str) -> pd.DataFrame:
+    """
+    Fetch the complete daily history for a symbol with caching.
+    
+    This is the single cached copy every period is sliced from. It is
+    shared between sessions without copying, so callers must not modify it.
+    Once expired it keeps being served while a background refresh runs.
+    
+    Args:
+        symbol: Stock symbol
+    
+    Returns:
+        DataFrame with the full daily price history, or None if unavailable
+    """
+    # Daily history is kept on disk and only the newest bars are fetched
+    df = history_store.get(symbol)
+    return df if df is not None and not df.empty else None
+
+def get_stock_data(symbol: str, period: str) -> pd.DataFrame:
     """
-    Fetch dividend history from Yahoo Finance with caching.
+    Fetch stock data for a period by slicing the cached full history.
+    
+    Switching periods never touches the network: every period is a view
+    into the same per-symbol frame returned by get_full_history.
     
     Args:
         symbol: Stock symbol
+        period: Time period for historical data
     
     Returns:
-        DataFrame with dividend history
+        DataFrame with stock price data
     """
     try:
-        stock = yf.Ticker(symbol)
-        dividends = stock.dividends
-        if not dividends.empty:
-            df = pd.DataFrame(dividends)
-            df.index = pd.to_datetime(df.index)
+        df = get_full_history(symbol)
+        if df is None:
+            return None
+        if period == "max":
             return df
-        return None
+        if period == "ytd":
+            start = pd.Timestamp(year=df.index[-1].year, month=1, day=1, tz=df.index.tz)
+        elif period in PERIOD_OFFSETS:
+            start = df.index[-1] - PERIOD_OFFSETS[period]
+        else:
+            raise ValueError(f"Unsupported period: {period}")
+        # Positional slicing returns a view rather than a copy of the rows
+        return df.iloc[df.index.searchsorted(start):]
     except Exception as e:
-        st.error(f"Error fetching dividend data: {str(e)}")
+        st.error(f"Error fetching data: {str(e)}")
         return None
-@st.cache_data(ttl=3600)
+
+@swr_cache("dividends")
 def get_dividend_data(symbol: str) -> pd.DataFrame:
     """
-    Fetch dividend history from Yahoo Finance with caching.
+    Fetch dividend history with caching.
+    
+    Upstream errors are raised rather than cached, so an outage keeps the
+    last good history in place; callers handle them.
     
     Args:
         symbol: Stock symbol
     
     Returns:
-        DataFrame with dividend history
+        DataFrame with dividend history, or None if the stock pays none
     """
-    try:
-        stock = yf.Ticker(symbol)
-        dividends = stock.dividends
-        if not dividends.empty:
-            df = pd.DataFrame(dividends)
-            df.index = pd.to_datetime(df.index)
-            return df
-        return None
-    except Exception as e:
-        st.error(f"Error fetching dividend data: {str(e)}")
+    dividends = get_provider().dividends(symbol)
+    if dividends.empty:
         return None
+    df = pd.DataFrame(dividends)
+    df.index = pd.to_datetime(df.index)
+    return df
 
-def download_csv(df: pd.DataFrame, filename: str):
+def export_bytes(df: pd.DataFrame, fmt: str) -> bytes:
     """
-    Create a download button for CSV export.
+    Serialize a DataFrame in one of the EXPORT_FORMATS.
     
     Args:
         df: DataFrame to export
-        filename: Name for the downloaded file
+        fmt: Key of EXPORT_FORMATS
+    
+    Returns:
+        File contents
+    """
+    if fmt == "CSV":
+        return df.to_csv(index=True).encode("utf-8")
+    if fmt == "CSV (gzip)":
+        return gzip.compress(df.to_csv(index=True).encode("utf-8"))
+    
+    # Columnar formats need string column names, e.g. for fiscal year columns
+    df = df.rename(columns=str)
+    buffer = io.BytesIO()
+    if fmt == "Parquet":
+        df.to_parquet(buffer, compression="zstd")
+    elif fmt == "Arrow":
+        table = pa.Table.from_pandas(df)
+        options = pa.ipc.IpcWriteOptions(compression="zstd")
+        with pa.ipc.new_file(buffer, table.schema, options=options) as writer:
+            writer.write_table(table)
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+    return buffer.getvalue()
+
+def export_bundle(frames: Dict[str, pd.DataFrame], fmt: str) -> bytes:
+    """
+    Pack several DataFrames into one zip archive, one file per frame.
+    
+    Args:
+        frames: DataFrames keyed by file name without extension
+        fmt: Key of EXPORT_FORMATS
+    
+    Returns:
+        Zip archive contents
+    """
+    extension = EXPORT_FORMATS[fmt][0]
+    buffer = io.BytesIO()
+    # The files are compressed already, except plain CSV
+    compression = zipfile.ZIP_DEFLATED if fmt == "CSV" else zipfile.ZIP_STORED
+    with zipfile.ZipFile(buffer, "w", compression=compression) as archive:
+        for name, df in frames.items():
+            archive.writestr(f"{name}.{extension}", export_bytes(df, fmt))
+    return buffer.getvalue()
+
+def download_data(get_frames: Callable[[], Dict[str, pd.DataFrame]], filename: str, key: str,
+                  label: str = "Download"):
+    """
+    Offer data for download, building the file only when the user asks.
+    
+    Nothing is serialized on ordinary reruns: a prepare button builds the
+    file in the chosen format and keeps it in the session until it is
+    downloaded or the export changes. One frame is exported as a single
+    file, several as a zip archive.
+    
+    Args:
+        get_frames: Returns the DataFrames to export, keyed by file name
+            without extension; only called when the file is prepared
+        filename: Name for the downloaded file, without extension
+        key: Unique key for this export's widgets and session state
+        label: Download button label
     """
-    csv = df.to_csv(index=True)
+    state_key = f"export_{key}"
+    fmt = st.selectbox("Format", list(EXPORT_FORMATS), key=f"{state_key}_format")
+    
+    prepared = st.session_state.get(state_key)
+    if prepared is not None and prepared["request"] != (filename, fmt):
+        # The symbol or format changed since the file was built
+        del st.session_state[state_key]
+        prepared = None
+    
+    if prepared is None:
+        if not st.button(f"Prepare {label.lower()}", key=f"{state_key}_prepare"):
+            return
+        frames = get_frames()
+        if len(frames) == 1:
+            data = export_bytes(next(iter(frames.values())), fmt)
+            file_name, mime = f"{filename}.{EXPORT_FORMATS[fmt][0]}", EXPORT_FORMATS[fmt][1]
+        else:
+            data = export_bundle(frames, fmt)
+            file_name, mime = f"{filename}.zip", "application/zip"
+        prepared = {"request": (filename, fmt), "data": data, "file_name": file_name, "mime": mime}
+        st.session_state[state_key] = prepared
+    
     st.download_button(
-        label="Download CSV",
-        data=csv,
-        file_name=f"{filename}.csv",
-        mime="text/csv"
+        label=label,
+        data=prepared["data"],
+        file_name=prepared["file_name"],
+        mime=prepared["mime"],
+        key=f"{state_key}_download",
+        # Release the file once it has been downloaded
+        on_click=lambda: st.session_state.pop(state_key, None)
     )